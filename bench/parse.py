@@ -0,0 +1,78 @@
+"""
+Parse-only benchmark: time and peak memory per page for each scraper
+parser over the bench fixtures, comparing the old full-tree
+``html.parser`` build with the configured backend and partial parsing:
+
+    python -m bench.parse --repeat 50
+    python -m bench.parse --parser html.parser     # partial parsing only
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+import scrapers.khamsat as khamsat
+import scrapers.mostaql as mostaql
+from scrapers import parsing
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# (label, fixture, parse function)
+CASES = [
+    ("mostaql list", "mostaql_list.html", mostaql.MostaqlScraper._parse_projects),
+    ("mostaql detail", "mostaql_project.html", mostaql.MostaqlScraper._parse_description),
+    ("khamsat list", "khamsat_list.html", khamsat.KhamsatScraper._parse_list),
+    ("khamsat detail", "khamsat_request.html", khamsat.KhamsatScraper._parse_description),
+]
+
+
+def measure(fn, html: str, repeat: int) -> dict:
+    fn(html)  # warm up selector/regex caches
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(html)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    result = fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50_ms": statistics.median(times) * 1000,
+        "peak_kib": peak / 1024,
+        "result": result,
+    }
+
+
+def run(parser: str, partial: bool, fn, html: str, repeat: int) -> dict:
+    parsing.PARSER, parsing.PARTIAL = parser, partial
+    return measure(fn, html, repeat)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HTML parse benchmark over the bench fixtures.")
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--parser", default=parsing.PARSER, help="tree builder to compare against html.parser")
+    args = ap.parse_args()
+
+    configured = (parsing.PARSER, parsing.PARTIAL)
+    print(f"baseline: html.parser, full tree   candidate: {args.parser}, partial")
+    try:
+        for label, fixture, fn in CASES:
+            html = (FIXTURES / fixture).read_text(encoding="utf-8")
+            old = run("html.parser", False, fn, html, args.repeat)
+            new = run(args.parser, True, fn, html, args.repeat)
+            same = "same" if old["result"] == new["result"] else "DIFFERENT"
+            print(
+                f"  {label:15} {len(html) / 1024:6.1f} KiB  "
+                f"{old['p50_ms']:7.2f} -> {new['p50_ms']:7.2f} ms "
+                f"({old['p50_ms'] / new['p50_ms']:4.1f}x)  "
+                f"peak {old['peak_kib']:7.0f} -> {new['peak_kib']:6.0f} KiB  {same} output"
+            )
+    finally:
+        parsing.PARSER, parsing.PARTIAL = configured
+
+
+if __name__ == "__main__":
+    main()
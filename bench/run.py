@@ -0,0 +1,253 @@
+"""
+Offline benchmark of the scrape -> enrich -> notify pipeline against the
+local stub server (no real network). Reports per-stage throughput, p50/p95
+latency and peak Python memory, and saves the numbers as JSON so runs can
+be compared:
+
+    python -m bench.run --latency 0.05 --label before
+    python -m bench.run --latency 0.05 --label after --compare bench/results/before.json
+"""
+import argparse
+import dataclasses
+import functools
+import json
+import math
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import scrapers.khamsat as khamsat
+import scrapers.mostaql as mostaql
+from bench.stub_server import StubServer
+from clients.llm_client import LLMClient
+from clients.telegram_client import TelegramClient
+from config import AppConfig
+from net.fetcher import FetchEngine
+from net.transport import HttpTransport
+from scrapers.listing import ListingFilter
+from services.metrics import METRICS
+from services.proposal_service import ProposalService
+from storage.seen_jobs import SeenJobStore
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# (attribute, stage name) pairs timed on each object
+SCRAPER_STAGES = {
+    "mostaql": [
+        ("_fetch_projects_page", "list_fetch"),
+        ("_parse_projects", "list_parse"),
+        ("_fetch_project_description", "detail"),
+    ],
+    "khamsat": [
+        ("_fetch", "list_fetch"),
+        ("_parse_list", "list_parse"),
+        ("_fetch_description", "detail"),
+    ],
+}
+
+
+class Recorder:
+    """Collects wall-clock durations per stage from wrapped callables."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, obj, attr: str, stage: str) -> None:
+        fn = getattr(obj, attr)
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.samples.setdefault(stage, []).append(elapsed)
+
+        setattr(obj, attr, timed)
+
+    def summary(self, wall: float) -> dict:
+        out = {}
+        for stage, values in sorted(self.samples.items()):
+            ordered = sorted(values)
+            out[stage] = {
+                "count": len(values),
+                "total_s": round(sum(values), 4),
+                "per_s": round(len(values) / wall, 2) if wall else 0.0,
+                "p50_ms": round(statistics.median(ordered) * 1000, 2),
+                "p95_ms": round(ordered[min(math.ceil(len(ordered) * 0.95), len(ordered)) - 1] * 1000, 2),
+            }
+        return out
+
+
+def point_scrapers_at(stub: StubServer) -> None:
+    mostaql.BASE_URL = stub.url
+    mostaql.CATEGORY_URLS = [
+        f"{stub.url}/projects/{url.rsplit('/', 1)[-1]}" for url in mostaql.CATEGORY_URLS
+    ]
+    khamsat.BASE_URL = stub.url
+    khamsat.REQUESTS_URL = f"{stub.url}/community/requests"
+    khamsat.MAX_ITEMS_PER_RUN = 10**6
+
+
+def run_source(name: str, cls, cfg: AppConfig, enrich: bool) -> dict:
+    transport = HttpTransport.from_config(cfg)
+    fetcher = FetchEngine.from_config(cfg, transport)
+    llm = LLMClient(cfg.llm_api_base, cfg.llm_api_key, cfg.llm_model, transport)
+    telegram = TelegramClient.from_config(cfg, transport)
+    service = ProposalService(llm, enabled=enrich, max_in_flight=cfg.llm_max_in_flight)
+    seen = SeenJobStore(":memory:")
+
+    scraper = cls(service, telegram, seen, fetcher)
+    scraper.listing_filter = ListingFilter.from_config(cfg)
+    recorder = Recorder()
+    for attr, stage in SCRAPER_STAGES[name]:
+        # parsers sent to worker processes must stay picklable (unwrapped);
+        # their time still shows up in the stage_seconds metrics
+        if cfg.parse_workers and stage == "list_parse":
+            continue
+        recorder.wrap(scraper, attr, stage)
+    recorder.wrap(llm, "generate_json", "llm")
+    recorder.wrap(telegram, "_post", "telegram")
+
+    started = time.perf_counter()
+    first_alert = []
+    send = telegram.send
+
+    def send_and_mark(*args, **kwargs):
+        if not first_alert:
+            first_alert.append(time.perf_counter() - started)
+        return send(*args, **kwargs)
+
+    telegram.send = send_and_mark
+
+    try:
+        jobs = scraper.run()
+        telegram.flush()
+    finally:
+        wall = time.perf_counter() - started
+        fetcher.close()
+        telegram.close()
+        transport.close()
+        seen.close()
+
+    stages = recorder.summary(wall)
+    return {
+        "wall_s": round(wall, 3),
+        "jobs": jobs,
+        "jobs_per_s": round(jobs / wall, 2) if wall else 0.0,
+        "pages_per_s": stages.get("list_fetch", {}).get("per_s", 0.0),
+        "time_to_first_alert_s": round(first_alert[0], 3) if first_alert else None,
+        "stages": stages,
+    }
+
+
+def compare(current: dict, baseline: dict) -> None:
+    print(f"\ncompared with {baseline.get('label')} ({baseline.get('timestamp')}):")
+    for name, res in current["sources"].items():
+        old = baseline.get("sources", {}).get(name)
+        if not old:
+            continue
+        for key in ("wall_s", "jobs_per_s", "pages_per_s"):
+            a, b = old.get(key) or 0, res.get(key) or 0
+            change = f"{(b - a) / a:+.0%}" if a else "n/a"
+            print(f"  {name:8} {key:12} {a:>10} -> {b:<10} {change}")
+    a, b = baseline.get("peak_mem_mb") or 0, current["peak_mem_mb"]
+    print(f"  peak_mem_mb           {a:>10} -> {b}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark.")
+    parser.add_argument("--sources", default="mostaql,khamsat")
+    parser.add_argument("--latency", type=float, default=0.02, help="mean stub response time (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--pages", type=int, default=3, help="list pages per category")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--enrich", action="store_true", help="call the stub LLM for every job")
+    parser.add_argument("--rate", type=float, default=0.0, help="per-host req/s (0 = unlimited)")
+    parser.add_argument("--in-flight", type=int, default=4, help="per-host max in-flight requests")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, default=0, help="parse process pool size (0 = inline)")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--compare", help="earlier result JSON to diff against")
+    args = parser.parse_args()
+
+    stub = StubServer(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        pages=args.pages,
+        llm_latency=args.llm_latency,
+    ).start()
+    point_scrapers_at(stub)
+
+    cfg = dataclasses.replace(
+        AppConfig(),
+        llm_api_base=stub.url,
+        llm_api_key="bench",
+        telegram_token="bench",
+        telegram_chat_id="1",
+        telegram_api_base=stub.url,
+        telegram_chat_rate=0.0,
+        telegram_global_rate=0.0,
+        http_cache_path="",
+        fetch_rate_per_host=args.rate,
+        fetch_max_in_flight=args.in_flight,
+        fetch_workers=args.workers,
+        parse_workers=args.parse_workers,
+        http_max_retries=2,
+    )
+
+    classes = {"mostaql": mostaql.MostaqlScraper, "khamsat": khamsat.KhamsatScraper}
+    names = [n.strip() for n in args.sources.split(",") if n.strip()]
+
+    tracemalloc.start()
+    results = {}
+    try:
+        for name in names:
+            results[name] = run_source(name, classes[name], cfg, args.enrich)
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stub.stop()
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    report = {
+        "label": args.label or stamp,
+        "timestamp": stamp,
+        "params": vars(args),
+        "sources": results,
+        "peak_mem_mb": round(peak / 1024 / 1024, 2),
+        "stub_requests": stub.requests,
+        "metrics": METRICS.snapshot(),
+    }
+
+    for name, res in results.items():
+        print(
+            f"{name:8} {res['jobs']:4} jobs in {res['wall_s']:7.2f}s "
+            f"({res['jobs_per_s']} jobs/s, {res['pages_per_s']} pages/s, "
+            f"first alert {res['time_to_first_alert_s']}s)"
+        )
+        for stage, s in res["stages"].items():
+            print(
+                f"    {stage:11} n={s['count']:<5} {s['per_s']:>8}/s "
+                f"p50={s['p50_ms']:>8}ms p95={s['p95_ms']:>8}ms"
+            )
+    print(f"peak python memory {report['peak_mem_mb']} MiB, {stub.requests} stub requests")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out = RESULTS_DIR / f"{report['label']}.json"
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"saved {out}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
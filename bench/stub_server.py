@@ -0,0 +1,193 @@
+"""
+Local stand-in for mostaql.com, khamsat.com, the OpenRouter
+``/chat/completions`` endpoint and Telegram ``sendMessage``, serving the
+HTML fixtures in ``bench/fixtures`` with configurable latency and error
+rate. Run it directly to poke at it by hand:
+
+    python -m bench.stub_server --port 8765 --latency 0.05
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+_MOSTAQL_ID = re.compile(r"https://mostaql\.com/project/(\d+)")
+_KHAMSAT_ID = re.compile(r"/community/requests/(\d+)")
+_MAIN = re.compile(r"<main>.*</main>", re.S)
+
+LLM_REPLY = {
+    "summary": "ملخص قصير للمشروع.",
+    "plan": "1. تحليل المتطلبات\n2. التنفيذ\n3. التسليم",
+    "proposal": "مرحبا، يسعدني تنفيذ مشروعك باستخدام Python.",
+}
+
+
+def _load(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+class StubServer:
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        pages: int = 3,
+        llm_latency: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.pages = pages
+        self.llm_latency = llm_latency
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.sent_messages = 0
+
+        self.fixtures = {
+            name: _load(name)
+            for name in (
+                "mostaql_list.html",
+                "mostaql_project.html",
+                "khamsat_list.html",
+                "khamsat_request.html",
+            )
+        }
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # =====================================================
+    # routing
+    # =====================================================
+
+    def _route(self, method: str, path: str, query: dict) -> tuple[int, str, str]:
+        page = int(query.get("page", ["1"])[0])
+
+        if method == "POST" and path.endswith("/chat/completions"):
+            if self.llm_latency:
+                time.sleep(self.llm_latency)
+            body = {
+                "choices": [{"message": {"content": json.dumps(LLM_REPLY, ensure_ascii=False)}}],
+                "usage": {"prompt_tokens": 900, "completion_tokens": 300, "total_tokens": 1200},
+            }
+            return 200, "application/json", json.dumps(body)
+
+        if method == "POST" and path.endswith("/sendMessage"):
+            with self._lock:
+                self.sent_messages += 1
+            return 200, "application/json", '{"ok": true, "result": {}}'
+
+        if path.startswith("/projects/"):
+            return 200, "text/html", self._mostaql_list(path, page)
+        if path.startswith("/project/"):
+            return 200, "text/html", self.fixtures["mostaql_project.html"]
+        if path == "/community/requests":
+            return 200, "text/html", self._khamsat_list(page)
+        if path.startswith("/community/requests/"):
+            return 200, "text/html", self.fixtures["khamsat_request.html"]
+
+        return 404, "text/plain", "not found"
+
+    def _mostaql_list(self, path: str, page: int) -> str:
+        html = self.fixtures["mostaql_list.html"]
+        if page > self.pages:
+            return _MAIN.sub("<main></main>", html)
+        # distinct ids per category and page, links pointing back at the stub
+        offset = (zlib.crc32(path.encode()) % 100) * 100_000 + page * 1000
+        return _MOSTAQL_ID.sub(
+            lambda m: f"{self.url}/project/{int(m.group(1)) + offset}", html
+        )
+
+    def _khamsat_list(self, page: int) -> str:
+        html = self.fixtures["khamsat_list.html"]
+        if page > self.pages:
+            return _MAIN.sub("<main></main>", html)
+        return _KHAMSAT_ID.sub(
+            lambda m: f"/community/requests/{int(m.group(1)) + page * 1000}", html
+        )
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self, method: str):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with stub._lock:
+                    stub.requests += 1
+                    fail = stub.random.random() < stub.error_rate
+                    delay = stub.random.uniform(0.5, 1.5) * stub.latency
+                if delay:
+                    time.sleep(delay)
+
+                parts = urlsplit(self.path)
+                if fail:
+                    status, ctype, body = 503, "text/plain", "unavailable"
+                else:
+                    status, ctype, body = stub._route(method, parts.path, parse_qs(parts.query))
+
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", f"{ctype}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+
+    server = StubServer(args.port, args.latency, args.error_rate, args.pages).start()
+    print(f"stub server on {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
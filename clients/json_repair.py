@@ -0,0 +1,156 @@
+import json
+import re
+
+# a quote inside a string only ends it when followed by one of these
+_STRING_END = set(",}]:")
+
+
+def _ends_string(text: str, i: int) -> bool:
+    """Whether the quote at ``text[i]`` closes a string (vs. a stray inner quote)."""
+    for ch in text[i + 1:]:
+        if not ch.isspace():
+            return ch in _STRING_END
+    return True
+
+
+def repair(text: str) -> tuple[str, bool]:
+    """
+    Best-effort fix of almost-JSON in one pass: raw control characters
+    inside strings are escaped, stray inner quotes are escaped, trailing
+    commas are dropped and a truncated document is closed (open string,
+    then open objects/arrays). Returns the text and whether an unterminated
+    string had to be closed (i.e. the last value is cut off).
+    """
+    out: list[str] = []
+    stack: list[str] = []
+    in_str = escaped = is_value = False
+
+    for i, ch in enumerate(text):
+        if in_str:
+            if escaped:
+                out.append(ch)
+                escaped = False
+            elif ch == "\\":
+                out.append(ch)
+                escaped = True
+            elif ch == '"':
+                if _ends_string(text, i):
+                    in_str = False
+                    out.append(ch)
+                else:
+                    out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\r":
+                out.append("\\r")
+            elif ch == "\t":
+                out.append("\\t")
+            elif ord(ch) < 0x20:
+                out.append(f"\\u{ord(ch):04x}")
+            else:
+                out.append(ch)
+            continue
+
+        if ch == '"':
+            in_str = True
+            # keys are dropped when cut; only a cut value counts as truncated
+            prev = "".join(out).rstrip()[-1:]
+            is_value = prev == ":"
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+        out.append(ch)
+
+    truncated = in_str and is_value
+    if escaped:
+        out.pop()
+    if in_str:
+        out.append('"')
+    _drop_dangling(out)
+    while stack:
+        _drop_trailing_comma(out)
+        out.append(stack.pop())
+    return "".join(out), truncated
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
+
+
+def _drop_dangling(out: list[str]) -> None:
+    # cut inside a pair: `"key":` or `"key"` with no value yet
+    tail = "".join(out).rstrip()
+    m = re.search(r',?\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', tail)
+    if m and (tail.endswith(":") or re.search(r'[{,]\s*"(?:[^"\\]|\\.)*"\s*$', tail)):
+        out[:] = list(tail[: m.start()])
+
+
+def _field(text: str, name: str) -> tuple[str | None, bool]:
+    """Raw scan for ``"name": "..."``; returns (value, complete)."""
+    m = re.search(rf'"{re.escape(name)}"\s*:\s*"', text)
+    if not m:
+        return None, False
+    chars: list[str] = []
+    i = m.end()
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and i + 1 < len(text):
+            chars.append(text[i:i + 2])
+            i += 2
+            continue
+        if ch == '"' and _ends_string(text, i):
+            break
+        chars.append('\\"' if ch == '"' else ch)
+        i += 1
+    raw = "".join(chars).replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+    try:
+        value = json.loads(f'"{raw}"')
+    except ValueError:
+        value = raw
+    return value, i < len(text)
+
+
+def salvage(text: str, fields: tuple[str, ...] = ()) -> tuple[dict, dict]:
+    """
+    Parse model output that should be a JSON object with ``fields``.
+
+    Returns ``(complete, partial)``: values that parsed in full, and values
+    that were cut off (usable as a fallback, but worth re-requesting).
+    Raises ``ValueError`` when nothing at all can be recovered.
+    """
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data, {}
+    except ValueError:
+        pass
+
+    partial: dict = {}
+    fixed, truncated = repair(text)
+    try:
+        data = json.loads(fixed)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        if truncated and data:
+            last = list(data)[-1]
+            partial[last] = data.pop(last)
+        return data, partial
+
+    # structure beyond repair: pull the expected string fields out one by one
+    complete: dict = {}
+    for name in fields:
+        value, ok = _field(text, name)
+        if value is None:
+            continue
+        (complete if ok else partial)[name] = value
+    if not complete and not partial:
+        raise ValueError("no JSON object could be recovered")
+    return complete, partial
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(model: str, system: str, prompt: str) -> str:
+    h = hashlib.sha256()
+    for part in (model, system, prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+@dataclass
+class LLMCacheStats:
+    hits: int = 0
+    misses: int = 0
+    tokens_saved: int = 0
+    seconds_saved: float = 0.0
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (
+            f"llm cache: {self.hits}/{total} hits ({rate:.0%}), "
+            f"{self.tokens_saved} tokens and {self.seconds_saved:.0f}s saved"
+        )
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of parsed LLM outputs, keyed by a hash of
+    (model, system prompt, prompt). Entries expire after ``ttl`` seconds and
+    the least recently used ones are dropped beyond ``max_entries``.
+    """
+
+    def __init__(self, path: str, ttl: float = 30 * 86400, max_entries: int = 5000):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = LLMCacheStats()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL + a long busy timeout: queue worker processes share this file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key         TEXT PRIMARY KEY,
+                model       TEXT NOT NULL,
+                created_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                output      TEXT NOT NULL,
+                tokens      INTEGER NOT NULL DEFAULT 0,
+                latency     REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        """Return the cached output for ``key`` or ``None``; counts hit/miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output, tokens, latency, created_at FROM llm_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and now - row[3] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.stats.hits += 1
+            self.stats.tokens_saved += row[1]
+            self.stats.seconds_saved += row[2]
+        return json.loads(row[0])
+
+    def peek(self, key: str) -> bool:
+        """Whether ``key`` has a live entry; touches neither the stats nor the LRU order."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def put(self, key: str, model: str, output, tokens: int = 0, latency: float = 0.0) -> None:
+        """Store a successfully parsed output."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                    (key, model, created_at, accessed_at, output, tokens, latency)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, model, now, now, json.dumps(output, ensure_ascii=False), tokens, latency),
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?",
+                (time.time() - self.ttl,),
+            ).rowcount
+            removed += self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def close(self) -> None:
+        self.evict()
+        logger.info(self.stats.summary())
+        with self._lock:
+            self._conn.close()
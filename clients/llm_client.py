@@ -1,23 +1,63 @@
-import requests, json, re, time
+import logging, re, time
+
+from clients.json_repair import salvage
+from clients.llm_cache import cache_key
+from net.transport import HttpTransport
+from services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You are a professional freelance consultant."
 
 class LLMClient:
-    def __init__(self, api_base, api_key, model):
+    def __init__(self, api_base, api_key, model, transport=None, cache=None, timeout=60):
         self.api_base = api_base
         self.api_key = api_key
         self.model = model
-
-
-    def generate_json(self, prompt):
+        self.transport = transport or HttpTransport()
+        self.cache = cache
+        self.timeout = timeout
+
+
+    def generate_json(self, prompt, system=SYSTEM_PROMPT, estimated_tokens=None, fields=()):
+        """
+        Ask for a JSON object and return it as a dict. Malformed output is
+        repaired locally (see ``clients.json_repair``); if some of
+        ``fields`` are still missing or cut off, only those are requested
+        again, up to three calls in total.
+        """
+
+        cached = self.cached(prompt, system)
+        if cached is not None:
+            return cached
+        return self.request_json(prompt, system, estimated_tokens, fields)
+
+    def cached(self, prompt, system=SYSTEM_PROMPT):
+        """The cached answer for this prompt, or None."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(cache_key(self.model, system, prompt))
+        if cached is not None:
+            METRICS.inc("llm_cache_hits_total", model=self.model)
+        return cached
+
+    def is_cached(self, prompt, system=SYSTEM_PROMPT):
+        """Cheap check for a cached answer, not counted as a cache hit or miss."""
+        return self.cache is not None and self.cache.peek(cache_key(self.model, system, prompt))
+
+    def request_json(self, prompt, system=SYSTEM_PROMPT, estimated_tokens=None, fields=()):
+        """:meth:`generate_json` minus the cache lookup (the result is still cached)."""
 
         if not self.api_key:
             raise RuntimeError("LLM_API_KEY missing")
 
+        key = cache_key(self.model, system, prompt)
         url = f"{self.api_base}/chat/completions"
 
         payload = {
             "model": self.model,
             "messages": [
-                {"role": "system", "content": "You are a professional freelance consultant."},
+                {"role": "system", "content": system},
                 {"role": "user", "content": prompt},
             ],
             "response_format": {"type": "json_object"},
@@ -30,10 +70,16 @@ class LLMClient:
             "X-Title": "Mostaql Bid Bot",
         }
 
+        started = time.monotonic()
+        result, partial = {}, {}
+        total_tokens = 0
+
         for attempt in range(1, 4):
 
-            r = requests.post(url, headers= headers, json=payload, timeout=60)
+            with METRICS.timer("llm_request_seconds", model=self.model):
+                r = self.transport.post(url, headers= headers, json=payload, timeout=self.timeout)
 
+            # 429/5xx were already retried by the transport; anything else won't improve
             if not r.ok:
                 raise RuntimeError(
                     f"LLM HTTP {r.status_code}: {r.text[:200]}"
@@ -43,21 +89,64 @@ class LLMClient:
 
             content = data["choices"][0]["message"].get("content", "")
 
-            try:
-                cleaned = self._clean(content)
-                return json.loads(cleaned)
-
-            except Exception as e:
+            usage = data.get("usage") or {}
+            total_tokens += usage.get("total_tokens", 0)
+            self._report_usage(usage, estimated_tokens if attempt == 1 else None)
 
+            try:
+                complete, cut = salvage(self._clean(content), fields)
+            except ValueError:
+                METRICS.inc("llm_json_errors_total", model=self.model)
                 print(
                     "[LLM] JSON parse failed. Raw response:\n",
                     content[:500],
                 )
-
-                if attempt == 3:
-                    raise
-
-                time.sleep(2 * attempt)
+                continue
+
+            result.update(complete)
+            partial.update(cut)
+            missing = [f for f in fields if not result.get(f)]
+
+            if not missing:
+                if self.cache is not None:
+                    self.cache.put(
+                        key,
+                        self.model,
+                        result,
+                        tokens=total_tokens,
+                        latency=time.monotonic() - started,
+                    )
+                return result
+
+            # ask again for just the fields that are still missing or cut off
+            METRICS.inc("llm_rerequests_total", model=self.model)
+            payload["messages"][1]["content"] = (
+                f"{prompt}\n\nReturn ONLY a JSON object with exactly these keys: "
+                + ", ".join(f'"{f}"' for f in missing)
+            )
+
+        # out of attempts: a cut-off value beats none (not cached, so it's retried next run)
+        for name, value in partial.items():
+            if not result.get(name):
+                result[name] = value
+        if not result:
+            raise ValueError("LLM returned no usable JSON")
+        return result
+
+    def _report_usage(self, usage, estimated_tokens):
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        # prefix-cache hits on the shared system prompt, when the provider reports them
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+        METRICS.inc("llm_tokens_total", prompt_tokens, model=self.model, kind="prompt")
+        METRICS.inc("llm_tokens_total", completion_tokens, model=self.model, kind="completion")
+        METRICS.inc("llm_tokens_total", cached_tokens, model=self.model, kind="cached")
+        if estimated_tokens:
+            METRICS.inc("llm_tokens_total", estimated_tokens, model=self.model, kind="estimated")
+        logger.info(
+            "LLM usage: prompt=%s (estimated %s, cached %s) completion=%s",
+            prompt_tokens, estimated_tokens, cached_tokens, completion_tokens,
+        )
 
     def _clean(self, text):
         text = text.strip()
@@ -65,4 +154,7 @@ class LLMClient:
             text = re.sub(r"^```[a-zA-Z0-9]*", "", text)
             text = re.sub(r"```$", "", text)
         s, e = text.find("{"), text.rfind("}")
-        return text[s:e+1]
+        if s < 0:
+            return text
+        # no closing brace after the opening one: truncated, keep the tail for repair
+        return text[s:e+1] if e > s else text[s:]
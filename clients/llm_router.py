@@ -0,0 +1,171 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from clients.llm_client import SYSTEM_PROMPT, LLMClient
+from services.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """Rolling latency and error window for one model/endpoint."""
+
+    def __init__(self, window: int = 100):
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.last_attempt = 0.0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.last_attempt = time.monotonic()
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(seconds)
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    def percentile(self, p: float) -> float | None:
+        with self._lock:
+            ordered = sorted(self._latencies)
+        if not ordered:
+            return None
+        return ordered[min(math.ceil(len(ordered) * p), len(ordered)) - 1]
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+
+class LLMRouter:
+    """
+    Drop-in for :class:`LLMClient` over several models/endpoints.
+
+    Each call goes to the healthy model with the lowest rolling p50. If it
+    has not answered by that model's ``hedge_percentile`` latency (or
+    ``hedge_after`` seconds while there are too few samples), or it fails,
+    the same request is sent to the next model and the first valid JSON
+    wins. The slower call is left to finish in the background; its latency
+    still feeds the stats.
+    """
+
+    def __init__(
+        self,
+        clients: list[LLMClient],
+        hedge_percentile: float = 0.95,
+        hedge_after: float = 20.0,
+        max_error_rate: float = 0.5,
+        probe_after: float = 300.0,
+        workers: int = 8,
+    ):
+        if not clients:
+            raise ValueError("LLMRouter needs at least one client")
+        self.clients = clients
+        self.stats = {c.model: ModelStats() for c in clients}
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.max_error_rate = max_error_rate
+        self.probe_after = probe_after
+        self._pool = ThreadPoolExecutor(max(workers, 2), thread_name_prefix="llm-route")
+
+    @classmethod
+    def from_config(cls, cfg, transport=None, cache=None) -> "LLMRouter":
+        clients = []
+        for item in cfg.llm_models.split(","):
+            # "model" or "model@https://endpoint/api/v1"
+            model, _, base = item.strip().partition("@")
+            if model:
+                clients.append(LLMClient(base or cfg.llm_api_base, cfg.llm_api_key, model,
+                                         transport, cache, timeout=cfg.llm_timeout))
+        return cls(
+            clients,
+            hedge_percentile=cfg.llm_hedge_percentile,
+            hedge_after=cfg.llm_hedge_after,
+            workers=cfg.llm_max_in_flight * 2,
+        )
+
+    @property
+    def model(self) -> str:
+        return self.ranked()[0].model
+
+    def ranked(self) -> list[LLMClient]:
+        now = time.monotonic()
+
+        def healthy(client):
+            stats = self.stats[client.model]
+            # a sick model gets a probe call again once it has rested
+            return stats.error_rate <= self.max_error_rate or now - stats.last_attempt > self.probe_after
+
+        def key(client):
+            stats = self.stats[client.model]
+            # unmeasured models sort first so each one gets sampled
+            return (not healthy(client), stats.percentile(0.5) or 0.0, stats.error_rate)
+
+        return sorted(self.clients, key=key)
+
+    def generate_json(self, prompt, system=SYSTEM_PROMPT, estimated_tokens=None, fields=()):
+        candidates = self.ranked()
+        # cache hits are answered here so they never skew the latency stats;
+        # only one lookup per call is counted, whichever model it is for
+        owner = next((c for c in candidates if c.is_cached(prompt, system)), candidates[0])
+        cached = owner.cached(prompt, system)
+        if cached is not None:
+            return cached
+        pending = {}
+        errors = []
+
+        def launch(client):
+            started = time.monotonic()
+            future = self._pool.submit(client.request_json, prompt, system, estimated_tokens, fields)
+            future.add_done_callback(
+                lambda f: self.stats[client.model].record(
+                    time.monotonic() - started, f.exception() is None
+                )
+            )
+            pending[future] = client
+
+        launch(candidates.pop(0))
+
+        while pending:
+            primary = next(iter(pending.values()))
+            delay = self._hedge_delay(primary) if candidates else None
+            done, _ = wait(list(pending), timeout=delay, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                client = pending.pop(future)
+                if future.exception() is None:
+                    METRICS.inc("llm_route_total", model=client.model, result="won")
+                    return future.result()
+                errors.append(future.exception())
+                METRICS.inc("llm_route_total", model=client.model, result="failed")
+                logger.warning("LLM %s failed: %s", client.model, future.exception())
+
+            # too slow or failed: race the next model against whatever is still running
+            if candidates and (not done or not pending):
+                client = candidates.pop(0)
+                if not done:
+                    METRICS.inc("llm_hedges_total", model=client.model)
+                launch(client)
+
+        raise errors[-1]
+
+    def is_cached(self, prompt, system=SYSTEM_PROMPT):
+        return any(c.is_cached(prompt, system) for c in self.clients)
+
+    def _hedge_delay(self, client) -> float:
+        stats = self.stats[client.model]
+        if stats.samples < 5:
+            return self.hedge_after
+        return stats.percentile(self.hedge_percentile)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
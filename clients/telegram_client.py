@@ -1,16 +1,264 @@
-import requests
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from net.politeness import TokenBucket
+from net.transport import HttpTransport
+from services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LEN = 4096
+DIGEST_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+_STOP = object()
+
+
+@dataclass
+class _Outgoing:
+    html: str
+    chat_id: str
+    callback: Callable[[bool], None] | None = None
+
+
+def split_message(parts, limit=MAX_MESSAGE_LEN):
+    """
+    Pack HTML ``parts`` into Telegram-sized chunks. Returns a list of
+    ``(text, part_indexes)``. Parts are never merged past ``limit``; a part
+    that is too long on its own is split on line boundaries, closing and
+    re-opening a ``<pre>`` block that spans the cut.
+    """
+    chunks = []
+    text, owners = "", []
+
+    for index, part in enumerate(parts):
+        candidate = part if not text else text + DIGEST_SEPARATOR + part
+        if len(candidate) <= limit:
+            text, owners = candidate, owners + [index]
+            continue
+        if text:
+            chunks.append((text, owners))
+            text, owners = "", []
+        if len(part) <= limit:
+            text, owners = part, [index]
+            continue
+        for piece in _split_long(part, limit):
+            chunks.append((piece, [index]))
+
+    if text:
+        chunks.append((text, owners))
+    return chunks
+
+
+def _split_long(html, limit):
+    room = limit - len("<pre>") - len("</pre>")
+
+    lines = []
+    for line in html.split("\n"):
+        # a single line longer than a message: hard cut
+        while len(line) > room:
+            lines.append(line[:room])
+            line = line[room:]
+        lines.append(line)
+
+    pieces, current, in_pre = [], "", False
+    for line in lines:
+        candidate = line if not current else current + "\n" + line
+        if len(candidate) > room:
+            pieces.append(current + "</pre>" if in_pre else current)
+            candidate = "<pre>" + line if in_pre else line
+        current = candidate
+        in_pre = current.count("<pre>") > current.count("</pre>")
+
+    if current:
+        pieces.append(current)
+    return pieces
+
 
 class TelegramClient:
-    def __init__(self, token, chat_id):
+    """
+    Queued Telegram delivery: ``send`` only puts the message on a local
+    outbox, and a background worker delivers it over the pooled transport,
+    respecting the per-chat and global rate limits. With ``digest_size`` > 1
+    messages that arrive within ``digest_wait`` seconds are packed into
+    digest messages split at the 4096-character limit.
+    """
+
+    def __init__(
+        self,
+        token,
+        chat_id,
+        transport=None,
+        digest_size=1,
+        digest_wait=2.0,
+        chat_rate=1.0,
+        global_rate=25.0,
+        api_base="https://api.telegram.org",
+        dry_run=False,
+    ):
         self.token = token
         self.chat_id = chat_id
+        self.transport = transport or HttpTransport()
+        self.digest_size = max(digest_size, 1)
+        self.digest_wait = digest_wait
+        self.chat_rate = chat_rate
+        self.api_base = api_base
+        # log messages instead of sending them (replay runs)
+        self.dry_run = dry_run
+
+        self.delivered = 0
+        self.failed = 0
+
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: dict[str, TokenBucket] = {}
+        self._outbox = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg, transport=None, dry_run=False):
+        return cls(
+            cfg.telegram_token,
+            cfg.telegram_chat_id,
+            transport,
+            digest_size=cfg.telegram_digest_size,
+            digest_wait=cfg.telegram_digest_wait,
+            chat_rate=cfg.telegram_chat_rate,
+            global_rate=cfg.telegram_global_rate,
+            api_base=cfg.telegram_api_base,
+            dry_run=dry_run,
+        )
 
-    def send(self, html):
-        if not self.token or not self.chat_id:
+    # =====================================================
+    # public
+    # =====================================================
+
+    def send(self, html, chat_id=None, callback=None):
+        """
+        Queue ``html`` for delivery and return immediately. ``callback`` is
+        called from the worker with ``True``/``False`` once it is known
+        whether the message went out.
+        """
+        chat_id = chat_id or self.chat_id
+        if not self.token or not chat_id:
             return
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
-        requests.get(url, params={
-            "chat_id": self.chat_id,
-            "text": html,
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="telegram", daemon=True)
+                self._worker.start()
+        self._outbox.put(_Outgoing(html, str(chat_id), callback))
+
+    def flush(self):
+        """Block until everything queued so far has been attempted."""
+        if self._worker is not None:
+            self._outbox.join()
+
+    def close(self):
+        if self._worker is not None:
+            self._outbox.put(_STOP)
+            self._worker.join()
+            self._worker = None
+        if self.delivered or self.failed:
+            logger.info("telegram: %s delivered, %s failed", self.delivered, self.failed)
+
+    # =====================================================
+    # worker
+    # =====================================================
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._outbox.get()
+            if item is _STOP:
+                self._outbox.task_done()
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.digest_wait
+            while len(batch) < self.digest_size:
+                try:
+                    nxt = self._outbox.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    self._outbox.task_done()
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            by_chat: dict[str, list[_Outgoing]] = {}
+            for msg in batch:
+                by_chat.setdefault(msg.chat_id, []).append(msg)
+            for chat_id, messages in by_chat.items():
+                self._deliver(chat_id, messages)
+
+            for _ in batch:
+                self._outbox.task_done()
+
+    def _deliver(self, chat_id, messages):
+        # a long message spans several chunks: it is delivered only if all
+        # of them are, and finished once, after its last chunk
+        ok = [True] * len(messages)
+        unfinished = set(range(len(messages)))
+        try:
+            chunks = split_message([m.html for m in messages])
+            last = {i: n for n, (_, owners) in enumerate(chunks) for i in owners}
+            for n, (text, owners) in enumerate(chunks):
+                # the rest of a message whose first piece failed is not worth sending
+                if any(ok[i] for i in owners):
+                    sent = self._post(chat_id, text)
+                    for i in owners:
+                        ok[i] = ok[i] and sent
+                for i in owners:
+                    if last[i] == n:
+                        unfinished.discard(i)
+                        self._finish([messages[i]], ok[i])
+        except Exception:
+            logger.exception("Telegram delivery crashed")
+            self._finish([messages[i] for i in sorted(unfinished)], False)
+
+    def _finish(self, messages, ok):
+        METRICS.inc("telegram_messages_total", len(messages), result="delivered" if ok else "failed")
+        for msg in messages:
+            if ok:
+                self.delivered += 1
+            else:
+                self.failed += 1
+            if msg.callback is not None:
+                try:
+                    msg.callback(ok)
+                except Exception:
+                    logger.exception("Telegram delivery callback failed")
+
+    def _post(self, chat_id, text):
+        if self.dry_run:
+            logger.info("[dry-run] message to %s (%s chars): %s", chat_id, len(text), text[:120].replace("\n", " "))
+            return True
+        url = f"{self.api_base}/bot{self.token}/sendMessage"
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
             "parse_mode": "HTML",
-        })
+            "disable_web_page_preview": True,
+        }
+        r = self._rate_limited(chat_id, url, payload)
+        if r.status_code == 400 and "parse entities" in r.text:
+            # broken markup: deliver as plain text rather than dropping it
+            logger.warning("Telegram rejected HTML, resending as plain text: %s", r.text[:200])
+            payload.pop("parse_mode")
+            r = self._rate_limited(chat_id, url, payload)
+        if not r.ok:
+            logger.warning("Telegram send failed: HTTP %s %s", r.status_code, r.text[:200])
+        return r.ok
+
+    def _rate_limited(self, chat_id, url, payload):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate)
+        waited = bucket.acquire() + self._global.acquire()
+        METRICS.inc("telegram_rate_wait_seconds_total", waited)
+        with METRICS.timer("telegram_send_seconds"):
+            return self.transport.post(url, json=payload, timeout=20)
@@ -6,5 +6,71 @@ class AppConfig:
     llm_api_base: str = os.getenv("LLM_API_BASE_URL", "https://openrouter.ai/api/v1")
     llm_api_key: str = os.getenv("LLM_API_KEY", "")
     llm_model: str = os.getenv("LLM_MODEL_NAME", "meta-llama/llama-3.1-8b-instruct")
+    llm_cache_path: str = os.getenv("LLM_CACHE_PATH", "data/llm_cache.db")
+    llm_cache_ttl: float = float(os.getenv("LLM_CACHE_TTL", str(30 * 86400)))
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    enrich_jobs: bool = os.getenv("ENRICH_JOBS", "1") == "1"
+    llm_max_in_flight: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+    llm_tokens_per_minute: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+    llm_timeout: float = float(os.getenv("LLM_TIMEOUT", "60"))
+    # "model[@api_base],..." to route between several models ("" = LLM_MODEL_NAME only)
+    llm_models: str = os.getenv("LLM_MODELS", "")
+    # hedge to the next model once the first passes this latency percentile
+    llm_hedge_percentile: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+    # ... or this many seconds while a model has fewer than 5 samples
+    llm_hedge_after: float = float(os.getenv("LLM_HEDGE_AFTER", "20"))
+    # estimated input tokens per proposal prompt; "model=tokens,..." overrides per model
+    llm_prompt_budget: int = int(os.getenv("LLM_PROMPT_BUDGET", "3000"))
+    llm_prompt_budgets: str = os.getenv("LLM_PROMPT_BUDGETS", "")
     telegram_token: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
     telegram_chat_id: str = os.getenv("TELEGRAM_CHAT_ID", "")
+    # JSON list of subscriber profiles to fan alerts out to ("" = TELEGRAM_CHAT_ID only)
+    subscribers_path: str = os.getenv("SUBSCRIBERS_PATH", "")
+    telegram_api_base: str = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org")
+    telegram_digest_size: int = int(os.getenv("TELEGRAM_DIGEST_SIZE", "1"))
+    telegram_digest_wait: float = float(os.getenv("TELEGRAM_DIGEST_WAIT", "2"))
+    telegram_chat_rate: float = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    telegram_global_rate: float = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+    sources: str = os.getenv("SOURCES", "khamsat,mostaql")
+    scraper_plugins: str = os.getenv("SCRAPER_PLUGINS", "")
+    source_timeout: float = float(os.getenv("SOURCE_TIMEOUT", "1800"))
+    watch_state_path: str = os.getenv("WATCH_STATE_PATH", "data/watch_state.json")
+    watch_min_interval: float = float(os.getenv("WATCH_MIN_INTERVAL", "120"))
+    watch_max_interval: float = float(os.getenv("WATCH_MAX_INTERVAL", "3600"))
+    metrics_json_path: str = os.getenv("METRICS_JSON", "data/metrics.json")
+    metrics_textfile_path: str = os.getenv("METRICS_TEXTFILE", "")
+    profile_path: str = os.getenv("PROFILE_OUT", "")
+    # sharded crawl: worker processes pulling tasks from a SQLite queue (0 = one process, no queue)
+    crawl_workers: int = int(os.getenv("CRAWL_WORKERS", "0"))
+    crawl_worker_threads: int = int(os.getenv("CRAWL_WORKER_THREADS", "4"))
+    queue_path: str = os.getenv("QUEUE_PATH", "data/queue.db")
+    queue_lease_seconds: float = float(os.getenv("QUEUE_LEASE_SECONDS", "600"))
+    queue_max_attempts: int = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+    seen_db_path: str = os.getenv("SEEN_DB_PATH", "data/seen_jobs.db")
+    # date-partitioned archive of every scraped job ("" = off)
+    archive_path: str = os.getenv("ARCHIVE_PATH", "data/archive")
+    archive_batch_size: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+    dedup_db_path: str = os.getenv("DEDUP_DB_PATH", "data/fingerprints.db")
+    dedup_max_distance: int = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+    dedup_window_days: float = float(os.getenv("DEDUP_WINDOW_DAYS", "30"))
+    relevance_top_k: int = int(os.getenv("RELEVANCE_TOP_K", "0"))
+    relevance_threshold: float = float(os.getenv("RELEVANCE_THRESHOLD", "0"))
+    # RELEVANCE_TOP_K is ignored by queue workers (--workers/--worker): each job is enriched on its own
+    # when streaming, RELEVANCE_TOP_K applies per window of this many seconds (0 = per run)
+    relevance_window: float = float(os.getenv("RELEVANCE_WINDOW", "0"))
+    # list-page pre-filter, applied before detail fetches (-1 / 0 = off)
+    max_bids: int = int(os.getenv("MAX_BIDS", "-1"))
+    min_budget: float = float(os.getenv("MIN_BUDGET", "0"))
+    max_age_hours: float = float(os.getenv("MAX_AGE_HOURS", "0"))
+    fetch_rate_per_host: float = float(os.getenv("FETCH_RATE_PER_HOST", "0.3"))
+    fetch_max_in_flight: int = int(os.getenv("FETCH_MAX_IN_FLIGHT", "2"))
+    fetch_workers: int = int(os.getenv("FETCH_WORKERS", "8"))
+    # processes for HTML parsing (0 = parse inline in the fetch threads)
+    parse_workers: int = int(os.getenv("PARSE_WORKERS", "0"))
+    http_max_retries: int = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    http_breaker_threshold: int = int(os.getenv("HTTP_BREAKER_THRESHOLD", "5"))
+    http_breaker_reset: float = float(os.getenv("HTTP_BREAKER_RESET", "60"))
+    http_cache_path: str = os.getenv("HTTP_CACHE_PATH", "data/http_cache.db")
+    http_cache_fresh_for: float = float(os.getenv("HTTP_CACHE_FRESH_FOR", str(6 * 3600)))
+    http_cache_max_age: float = float(os.getenv("HTTP_CACHE_MAX_AGE", str(14 * 86400)))
+    http_cache_max_mb: int = int(os.getenv("HTTP_CACHE_MAX_MB", "200"))
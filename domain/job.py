@@ -1,9 +1,59 @@
-from dataclasses import dataclass
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
 
-@dataclass
+
+_ID_SEGMENT = re.compile(r"^(\d+)")
+
+
+def canonical_key(url: str) -> str:
+    """
+    Stable key for a project URL: scheme/query/fragment and the trailing
+    slug are dropped, so ``/project/123-foo?x=1`` and ``/project/123-bar``
+    map to the same key.
+    """
+    parts = urlsplit(url.strip())
+    segments = [s for s in parts.path.split("/") if s]
+    if segments:
+        m = _ID_SEGMENT.match(segments[-1])
+        if m:
+            segments[-1] = m.group(1)
+    path = "/" + "/".join(segments)
+    return urlunsplit(("", parts.netloc.lower(), path, "", ""))
+
+
+@dataclass(slots=True)
 class Job:
     title: str
     url: str
     description: str = ""
+    # scraper name and per-source id (canonical_key of the url, as in the seen store)
+    source: str = ""
+    id: str = ""
+    # keywords the title matched, as spelled in the scraper's keyword list
+    matched_keywords: list[str] = field(default_factory=list)
+    # LLM enrichment
+    summary: str = ""
     plan: str = ""
     proposal: str = ""
+    score: float = 0.0
+    # list-page metadata (None = not shown by the source)
+    client: str = ""
+    bids: int | None = None
+    budget_min: float | None = None
+    budget_max: float | None = None
+    posted_at: datetime | None = None
+    # URLs of near-duplicate posts collapsed into this job
+    alt_urls: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.id:
+            self.id = canonical_key(self.url)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        return cls(**data)
@@ -1,20 +1,263 @@
+import argparse
+import dataclasses
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+
 from config import AppConfig
+from clients.llm_cache import LLMResponseCache
 from clients.llm_client import LLMClient
+from clients.llm_router import LLMRouter
 from clients.telegram_client import TelegramClient
+from services.crawl_worker import QueueWorker, seed_crawl
+from services.dedup import NearDuplicateIndex
+from services.prompt_builder import PromptBuilder
 from services.proposal_service import ProposalService
-from scrapers.khamsat import KhamsatScraper
-from scrapers.mostaql import MostaqlScraper
+from services.subscribers import SubscriberIndex, load_subscribers
+from services.watcher import AdaptiveSchedule, Watcher
+from scrapers.listing import ListingFilter
+from scrapers.registry import available_scrapers, resolve_scrapers
+from storage.archive import JobArchive
+from storage.seen_jobs import SeenJobStore
+from storage.work_queue import WorkQueue
+from net.fetcher import FetchEngine
+from net.politeness import SharedHostBudget
+from net.recording import RecordingTransport, ReplayTransport, TrafficArchive, TrafficRecorder, restore_state, snapshot_state
+from net.transport import HttpTransport
+from services.metrics import METRICS, profiled
+
+logger=logging.getLogger("main")
+
+# stores whose starting state decides what a run fetches: snapshotted by --record, restored by --replay
+STATE_STORES={"seen":"seen_db_path","dedup":"dedup_db_path","llm_cache":"llm_cache_path"}
+
+def parse_args(cfg):
+    parser=argparse.ArgumentParser(description="Scrape freelance jobs and send them to Telegram.")
+    parser.add_argument("--sources",default=cfg.sources,
+                        help=f"comma-separated sources to run (available: {', '.join(sorted(available_scrapers(cfg.scraper_plugins)))})")
+    parser.add_argument("--profile",default=cfg.profile_path,metavar="PATH",
+                        help="write one cProfile dump of the run, all threads merged, to PATH")
+    parser.add_argument("--watch",action="store_true",
+                        help="keep running and poll each source on an adaptive interval until SIGINT/SIGTERM")
+    parser.add_argument("--workers",type=int,default=cfg.crawl_workers,metavar="N",
+                        help="queue one crawl in QUEUE_PATH and run it with N worker processes (RELEVANCE_TOP_K does not apply)")
+    parser.add_argument("--worker",type=int,nargs="?",const=0,metavar="N",
+                        help="join a queued crawl (e.g. from another machine) as worker N (default 0) and work until it drains")
+    mode=parser.add_mutually_exclusive_group()
+    mode.add_argument("--record",nargs="?",const=time.strftime("data/recordings/%Y%m%d-%H%M%S.rec"),metavar="PATH",
+                      help="save every raw HTTP response to PATH (default data/recordings/<time>.rec), plus a snapshot of the seen, dedup and LLM-cache stores")
+    mode.add_argument("--replay",metavar="PATH",
+                      help="run against a --record archive: no network, no sleeps, Telegram dry run")
+    return parser.parse_args()
+
+class App:
+    """Clients, stores and caches shared by every source for one process."""
+
+    def __init__(self,cfg,record="",replay="",shared=False):
+        self.cfg=cfg
+        if replay:
+            self.transport=ReplayTransport(TrafficArchive(replay))
+        elif record:
+            # Telegram URLs carry the bot token: never written to the recording
+            self.transport=RecordingTransport(HttpTransport.from_config(cfg),TrafficRecorder(record),
+                                              skip=(f"{cfg.telegram_api_base}/bot",))
+        else:
+            self.transport=HttpTransport.from_config(cfg)
+        self.llm_cache=LLMResponseCache(cfg.llm_cache_path,cfg.llm_cache_ttl,cfg.llm_cache_max_entries) if cfg.llm_cache_path else None
+        if cfg.llm_models:
+            self.llm=LLMRouter.from_config(cfg,self.transport,self.llm_cache)
+        else:
+            self.llm=LLMClient(cfg.llm_api_base,cfg.llm_api_key,cfg.llm_model,self.transport,self.llm_cache,
+                               timeout=cfg.llm_timeout)
+        self.telegram=TelegramClient.from_config(cfg,self.transport,dry_run=bool(replay))
+        self.service=ProposalService(self.llm,enabled=cfg.enrich_jobs and bool(cfg.llm_api_key),
+                                     max_in_flight=cfg.llm_max_in_flight,tokens_per_minute=cfg.llm_tokens_per_minute,
+                                     prompts=PromptBuilder.from_config(cfg))
+        self.seen=SeenJobStore(cfg.seen_db_path)
+        # queue workers pace each host together, through the queue database
+        budget=SharedHostBudget(cfg.queue_path,cfg.fetch_rate_per_host,cfg.fetch_max_in_flight) if shared else None
+        self.fetcher=FetchEngine.from_config(cfg,self.transport,budget)
+        self.dedup=NearDuplicateIndex(cfg.dedup_db_path,cfg.dedup_max_distance,cfg.dedup_window_days) if cfg.dedup_db_path else None
+        self.archive=JobArchive(cfg.archive_path,cfg.archive_batch_size) if cfg.archive_path else None
+        self.subscribers=load_subscribers(cfg.subscribers_path) if cfg.subscribers_path else None
+
+    def scraper(self,cls):
+        scraper=cls(self.service,self.telegram,self.seen,self.fetcher,self.dedup)
+        scraper.top_k=self.cfg.relevance_top_k
+        scraper.min_score=self.cfg.relevance_threshold
+        scraper.relevance_window=self.cfg.relevance_window
+        scraper.listing_filter=ListingFilter.from_config(self.cfg)
+        scraper.archive=self.archive
+        if self.subscribers is not None:
+            # one crawl per source on the union of every subscriber's keywords
+            defaults=scraper.matcher.keywords.values() if scraper.matcher else ()
+            index=SubscriberIndex(self.subscribers,scraper.source,defaults)
+            scraper.matcher=index.matcher
+            if scraper.scorer is not None:
+                scraper.scorer=scraper.scorer.with_matcher(index.matcher)
+            scraper.subscribers=index
+        return scraper
+
+    def write_metrics(self):
+        METRICS.write(self.cfg.metrics_json_path,self.cfg.metrics_textfile_path)
+
+    def checkpoint(self):
+        # end of a watch cycle: persist what a crash would otherwise lose
+        if self.archive is not None:
+            self.archive.flush()
+        self.write_metrics()
+
+    def close(self):
+        self.fetcher.close()
+        if isinstance(self.llm,LLMRouter):
+            self.llm.close()
+        self.telegram.close()
+        self.transport.close()
+        if self.llm_cache is not None:
+            self.llm_cache.close()
+        self.write_metrics()
+        self.seen.close()
+        if self.dedup is not None:
+            self.dedup.close()
+        if self.archive is not None:
+            self.archive.close()
+
+def run_source(name,scraper,cfg):
+    scraper.deadline=time.monotonic()+cfg.source_timeout
+    with METRICS.timer("source_seconds",source=name):
+        return scraper.run()
+
+def run_once(app,scrapers,profile):
+    # each source in its own worker: they hit different hosts and share nothing
+    # but the politeness budget, so the run takes as long as the slowest one
+    cfg=app.cfg
+    with profiled(profile):
+        pool=ThreadPoolExecutor(max_workers=len(scrapers),thread_name_prefix="source")
+        try:
+            futures={pool.submit(run_source,name,app.scraper(cls),cfg):name
+                     for name,cls in scrapers.items()}
+            try:
+                for fut in as_completed(futures,timeout=cfg.source_timeout+60):
+                    name=futures[fut]
+                    try:
+                        logger.info("%s: %s jobs notified",name,fut.result())
+                    except Exception:
+                        METRICS.inc("source_failures_total",source=name)
+                        logger.exception("%s failed",name)
+            except TimeoutError:
+                stuck=[futures[f] for f in futures if not f.done()]
+                logger.error("sources still running after timeout: %s",", ".join(stuck))
+        finally:
+            pool.shutdown(wait=False,cancel_futures=True)
+        # queued alerts are part of the run (and of its profile)
+        app.telegram.flush()
+
+def watch(app,scrapers):
+    cfg=app.cfg
+    watcher=Watcher({name:app.scraper(cls) for name,cls in scrapers.items()},
+                    cfg.watch_state_path,
+                    AdaptiveSchedule(cfg.watch_min_interval,cfg.watch_max_interval),
+                    cycle_timeout=cfg.source_timeout,
+                    on_cycle=app.checkpoint)
+    signal.signal(signal.SIGTERM,watcher.stop)
+    signal.signal(signal.SIGINT,watcher.stop)
+    watcher.run()
+
+def tagged(path,tag):
+    """jobs.prom -> jobs.w0.prom: node_exporter's textfile collector only reads *.prom"""
+    if not path:
+        return ""
+    root,ext=os.path.splitext(path)
+    return f"{root}.{tag}{ext}"
+
+def work(names,tag):
+    """One queue worker process: its own App, scrapers and connections."""
+    logging.basicConfig(level=logging.INFO,format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # jobs are ranked one at a time here: a top-k cut would be a no-op, say so by disabling it
+    cfg=dataclasses.replace(AppConfig(),relevance_top_k=0)
+    # one metrics file per worker instead of all of them overwriting one
+    cfg=dataclasses.replace(cfg,metrics_json_path=tagged(cfg.metrics_json_path,tag),
+                            metrics_textfile_path=tagged(cfg.metrics_textfile_path,tag))
+    scrapers=resolve_scrapers(names,cfg.scraper_plugins)
+    app=App(cfg,shared=True)
+    queue=WorkQueue(cfg.queue_path,cfg.queue_lease_seconds,cfg.queue_max_attempts)
+    worker=QueueWorker(queue,{name:app.scraper(cls) for name,cls in scrapers.items()},threads=cfg.crawl_worker_threads)
+    signal.signal(signal.SIGTERM,worker.stop)
+    signal.signal(signal.SIGINT,worker.stop)
+    try:
+        logger.info("worker %s: %s tasks done",tag,worker.run())
+    finally:
+        queue.close()
+        app.close()
+
+def run_sharded(cfg,names,scrapers,workers,join=None):
+    if cfg.relevance_top_k:
+        # each job is enriched by its own task: no worker ever sees the batch to rank
+        logger.warning("RELEVANCE_TOP_K=%s is ignored by queue workers; only RELEVANCE_THRESHOLD applies",cfg.relevance_top_k)
+    queue=WorkQueue(cfg.queue_path,cfg.queue_lease_seconds,cfg.queue_max_attempts)
+    try:
+        if join is not None:
+            # worker indexes, not pids: repeated runs overwrite their metrics files instead of piling up
+            work(names,f"w{join}")
+        else:
+            logger.info("queued %s list tasks",seed_crawl(queue,scrapers,time.strftime("%Y%m%d-%H%M%S")))
+            # forkserver/spawn: fresh interpreters, no inherited SQLite handles or threads
+            methods=multiprocessing.get_all_start_methods()
+            ctx=multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            procs=[ctx.Process(target=work,args=(names,f"w{i}"),name=f"crawl-w{i}") for i in range(workers)]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+        logger.info("queue: %s",queue.counts())
+    finally:
+        queue.close()
 
 def main():
+    logging.basicConfig(level=logging.INFO,format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     cfg=AppConfig()
-    llm=LLMClient(cfg.llm_api_base,cfg.llm_api_key,cfg.llm_model)
-    telegram=TelegramClient(cfg.telegram_token,cfg.telegram_chat_id)
-    service=ProposalService(llm)
-
-    for cls in (KhamsatScraper,MostaqlScraper):
-        scraper=cls(service,telegram)
-        jobs=scraper.scrape()
-        scraper.enrich_and_notify(jobs)
+    args=parse_args(cfg)
+    sharded=args.workers>0 or args.worker is not None
+    if sharded and (args.watch or args.record or args.replay):
+        raise SystemExit("--workers/--worker run one queued crawl; they cannot be combined with --watch, --record or --replay")
+    workdir=""
+    if args.record:
+        # full bodies for every page: cached/304 responses would leave holes
+        cfg=dataclasses.replace(cfg,http_cache_path="")
+        snapshot_state(args.record,{name:getattr(cfg,f) for name,f in STATE_STORES.items() if getattr(cfg,f)})
+    if args.replay:
+        if args.watch:
+            raise SystemExit("--replay runs once; it cannot be combined with --watch")
+        # copies of the recorded run's starting state and no pacing, so the
+        # recording is re-processed exactly, at full speed
+        workdir=tempfile.mkdtemp(prefix="replay-")
+        state=restore_state(args.replay,STATE_STORES,workdir)
+        cfg=dataclasses.replace(cfg,http_cache_path="",seen_db_path=state["seen"] or ":memory:",
+                                dedup_db_path=state["dedup"] or "",llm_cache_path=state["llm_cache"] or "",
+                                archive_path="",fetch_rate_per_host=0.0,llm_tokens_per_minute=0,
+                                telegram_chat_rate=0.0,telegram_global_rate=0.0,telegram_digest_wait=0.0)
+    names=[n.strip() for n in args.sources.split(",") if n.strip()]
+    scrapers=resolve_scrapers(names,cfg.scraper_plugins)
+
+    if sharded:
+        run_sharded(cfg,names,scrapers,args.workers,join=args.worker)
+        return
+
+    app=App(cfg,record=args.record or "",replay=args.replay or "")
+    try:
+        if args.watch:
+            watch(app,scrapers)
+        else:
+            run_once(app,scrapers,args.profile)
+    finally:
+        app.close()
+        if workdir:
+            shutil.rmtree(workdir,ignore_errors=True)
 
 if __name__=="__main__":
     main()
@@ -0,0 +1,211 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from services.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+    evicted: int = 0
+
+    def summary(self) -> str:
+        total = self.hits + self.revalidated + self.misses
+        rate = (self.hits + self.revalidated) / total if total else 0.0
+        return (
+            f"http cache: {self.hits} fresh hits, {self.revalidated} revalidated (304), "
+            f"{self.misses} misses, hit rate {rate:.0%}, "
+            f"{self.bytes_saved / 1024:.0f} KiB not downloaded, {self.evicted} evicted"
+        )
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+    size: int
+    body: bytes = field(repr=False)
+    parser: str | None = None
+    parsed: object = None
+
+    @property
+    def text(self) -> str:
+        return zlib.decompress(self.body).decode("utf-8", errors="replace")
+
+
+class ResponseCache:
+    """
+    Disk-backed (SQLite) HTTP response cache. Bodies are stored zlib
+    compressed together with their validators and, optionally, the parsed
+    result so a fresh hit or a 304 can skip both download and parse.
+    Eviction is by age (``max_age``) and by total body size (LRU).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fresh_for: float = 6 * 3600,
+        max_age: float = 14 * 86400,
+        max_bytes: int = 200 * 1024 * 1024,
+    ):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.fresh_for = fresh_for
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL + a long busy timeout: queue worker processes share this file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url           TEXT PRIMARY KEY,
+                etag          TEXT,
+                last_modified TEXT,
+                fetched_at    REAL NOT NULL,
+                accessed_at   REAL NOT NULL,
+                size          INTEGER NOT NULL,
+                body          BLOB NOT NULL,
+                parser        TEXT,
+                parsed        TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS http_cache_accessed ON http_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    # =====================================================
+    # lookups
+    # =====================================================
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, fetched_at, size, body, parser, parsed "
+                "FROM http_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE http_cache SET accessed_at = ? WHERE url = ?",
+                (time.time(), url),
+            )
+            self._conn.commit()
+        parsed = json.loads(row[7]) if row[7] is not None else None
+        return CacheEntry(*row[:7], parsed=parsed)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self.fresh_for
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> dict:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    # =====================================================
+    # updates
+    # =====================================================
+
+    def store(self, url: str, resp, parser: str | None = None, parsed=None) -> None:
+        body = resp.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO http_cache
+                    (url, etag, last_modified, fetched_at, accessed_at, size, body, parser, parsed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    url,
+                    resp.headers.get("ETag"),
+                    resp.headers.get("Last-Modified"),
+                    now,
+                    now,
+                    len(body),
+                    zlib.compress(body, 6),
+                    parser,
+                    json.dumps(parsed, ensure_ascii=False) if parser else None,
+                ),
+            )
+            self._conn.commit()
+
+    def store_parsed(self, url: str, parser: str, parsed) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET parser = ?, parsed = ? WHERE url = ?",
+                (parser, json.dumps(parsed, ensure_ascii=False), url),
+            )
+            self._conn.commit()
+
+    def mark_revalidated(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET fetched_at = ? WHERE url = ?",
+                (time.time(), url),
+            )
+            self._conn.commit()
+
+    def count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self.stats, name, getattr(self.stats, name) + delta)
+        for name, delta in deltas.items():
+            METRICS.inc(f"http_cache_{name}_total", delta)
+
+    def evict(self) -> int:
+        """Drop entries older than ``max_age``, then LRU down to ``max_bytes``."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM http_cache WHERE fetched_at < ?",
+                (time.time() - self.max_age,),
+            )
+            removed = cur.rowcount
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(body)), 0) FROM http_cache"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT url, LENGTH(body) FROM http_cache ORDER BY accessed_at"
+                ).fetchall()
+                victims = []
+                for url, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((url,))
+                    total -= size
+                self._conn.executemany("DELETE FROM http_cache WHERE url = ?", victims)
+                removed += len(victims)
+            self._conn.commit()
+        self.count(evicted=removed)
+        return removed
+
+    def close(self) -> None:
+        self.evict()
+        logger.info(self.stats.summary())
+        with self._lock:
+            self._conn.close()
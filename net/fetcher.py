@@ -0,0 +1,171 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+import requests
+
+from net.cache import ResponseCache
+from net.politeness import HostBudget
+from net.transport import HttpTransport
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class FetchEngine:
+    """
+    Shared fetch engine for the scrapers: a bounded thread pool over the
+    shared :class:`HttpTransport`, with every request paced by a per-host
+    :class:`HostBudget` instead of fixed random sleeps.
+
+    With ``parse_workers > 0`` parsing runs in a process pool so it is not
+    serialised with network I/O behind the GIL; see :meth:`parse`.
+    """
+
+    def __init__(
+        self,
+        budget: HostBudget,
+        transport: HttpTransport | None = None,
+        workers: int = 8,
+        cache: ResponseCache | None = None,
+        parse_workers: int = 0,
+    ):
+        self.budget = budget
+        self.transport = transport or HttpTransport(pool_size=workers)
+        self.workers = max(workers, 1)
+        self.cache = cache
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="fetch",
+        )
+
+        self._parse_pool = None
+        if parse_workers > 0:
+            # fork is unsafe with the fetch threads running; forkserver/spawn
+            # start clean workers that only import the parser modules
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            self._parse_pool = ProcessPoolExecutor(parse_workers, mp_context=context)
+            # backpressure: at most two pages queued per worker, beyond that
+            # callers (fetch threads) wait instead of piling up HTML in memory
+            self._parse_slots = threading.BoundedSemaphore(parse_workers * 2)
+
+    @classmethod
+    def from_config(
+        cls,
+        cfg,
+        transport: HttpTransport | None = None,
+        budget: HostBudget | None = None,
+        lightweight: bool = False,
+    ) -> "FetchEngine":
+        """
+        The engine described by ``cfg``. ``lightweight`` keeps the politeness
+        budget but skips the on-disk cache and the parse processes.
+        """
+        budget = budget or HostBudget(
+            rate=cfg.fetch_rate_per_host,
+            max_in_flight=cfg.fetch_max_in_flight,
+        )
+        cache = None
+        if cfg.http_cache_path and not lightweight:
+            cache = ResponseCache(
+                cfg.http_cache_path,
+                fresh_for=cfg.http_cache_fresh_for,
+                max_age=cfg.http_cache_max_age,
+                max_bytes=cfg.http_cache_max_mb * 1024 * 1024,
+            )
+        return cls(
+            budget,
+            transport or HttpTransport.from_config(cfg),
+            workers=cfg.fetch_workers,
+            cache=cache,
+            parse_workers=0 if lightweight else cfg.parse_workers,
+        )
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """One GET, waiting for the host's politeness budget first."""
+        with self.budget.slot(url):
+            return self.transport.get(url, **kwargs)
+
+    def get_parsed(self, url: str, parse: Callable[[str], R], **kwargs) -> R:
+        """
+        GET ``url`` and return ``parse(body)``, going through the response
+        cache when one is configured. A fresh entry or a 304 reuses the
+        stored parse result; ``parse`` must return JSON-serialisable data.
+        """
+        if self.cache is None:
+            resp = self.get(url, **kwargs)
+            resp.raise_for_status()
+            return self.parse(parse, resp.text)
+
+        parser = f"{parse.__module__}.{parse.__qualname__}"
+        entry = self.cache.lookup(url)
+
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.count(hits=1, bytes_saved=entry.size)
+            return self._reuse(entry, parser, parse)
+
+        if entry is not None:
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers.update(self.cache.conditional_headers(entry))
+            kwargs["headers"] = headers
+
+        resp = self.get(url, **kwargs)
+
+        if resp.status_code == 304 and entry is not None:
+            self.cache.mark_revalidated(url)
+            self.cache.count(revalidated=1, bytes_saved=entry.size)
+            return self._reuse(entry, parser, parse)
+
+        resp.raise_for_status()
+        self.cache.count(misses=1)
+        parsed = self.parse(parse, resp.text)
+        self.cache.store(url, resp, parser, parsed)
+        return parsed
+
+    def _reuse(self, entry, parser: str, parse: Callable[[str], R]) -> R:
+        if entry.parser == parser:
+            return entry.parsed
+        # parser changed since the entry was written: re-parse the stored body
+        parsed = self.parse(parse, entry.text)
+        self.cache.store_parsed(entry.url, parser, parsed)
+        return parsed
+
+    def parse(self, parse: Callable[[str], R], html: str) -> R:
+        """
+        ``parse(html)``, in the parse process pool when one is configured.
+        ``parse`` must be picklable (a module-level function or static
+        method) and return compact data (text, dicts), never soup objects.
+        """
+        if self._parse_pool is None:
+            return parse(html)
+        with self._parse_slots:
+            return self._parse_pool.submit(parse, html).result()
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """
+        Run ``fn`` over ``items`` on the pool and return results in input
+        order. ``fn`` is expected to call :meth:`get` for its requests, so
+        concurrency per host is still bounded by the budget.
+        """
+        return list(self._pool.map(fn, items))
+
+    def imap(self, fn: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """Like :meth:`map`, but lazy: results are yielded in order as they finish."""
+        return self._pool.map(fn, items)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=True)
+        self.budget.close()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from services.metrics import METRICS
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.rate,
+        )
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; return seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= min(tokens, self.capacity):
+                    self._tokens -= tokens
+                    return waited
+                wait = (min(tokens, self.capacity) - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class HostBudget:
+    """
+    Per-host politeness budget: a request rate (token bucket) plus a cap on
+    concurrent in-flight requests. Hosts get their own limits lazily.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        max_in_flight: int = 1,
+        burst: float = 1.0,
+        overrides: dict[str, tuple[float, int]] | None = None,
+    ):
+        self.rate = rate
+        self.max_in_flight = max(max_in_flight, 1)
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _limits(self, host: str) -> tuple[TokenBucket, threading.BoundedSemaphore]:
+        with self._lock:
+            if host not in self._buckets:
+                rate, in_flight = self.overrides.get(
+                    host, (self.rate, self.max_in_flight)
+                )
+                self._buckets[host] = TokenBucket(rate, self.burst)
+                self._slots[host] = threading.BoundedSemaphore(max(in_flight, 1))
+            return self._buckets[host], self._slots[host]
+
+    @contextmanager
+    def slot(self, url: str):
+        """Hold one in-flight slot for ``url``'s host, paced by its bucket."""
+        host = urlsplit(url).netloc.lower()
+        bucket, sem = self._limits(host)
+        started = time.monotonic()
+        with sem:
+            bucket.acquire()
+            METRICS.observe("politeness_wait_seconds", time.monotonic() - started, host=host)
+            yield
+
+    def close(self) -> None:
+        pass
+
+
+class SharedHostBudget(HostBudget):
+    """
+    :class:`HostBudget` whose request rate is shared by every process
+    using the same SQLite file: each host has one ``next_at`` slot time,
+    claimed and pushed forward by ``1 / rate`` in a short write
+    transaction. In-flight caps stay per process.
+    """
+
+    def __init__(self, path: str, rate: float, max_in_flight: int = 1, overrides=None):
+        super().__init__(rate, max_in_flight, overrides=overrides)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS host_budget (host TEXT PRIMARY KEY, next_at REAL NOT NULL)"
+        )
+        self._db_lock = threading.Lock()
+
+    def _claim(self, host: str, rate: float) -> float:
+        """Reserve the host's next request slot; return seconds to wait for it."""
+        if rate <= 0:
+            return 0.0
+        with self._db_lock:
+            # wall clock: monotonic clocks are not comparable across processes
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT next_at FROM host_budget WHERE host = ?", (host,)).fetchone()
+                at = max(now, row[0] if row else 0.0)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO host_budget (host, next_at) VALUES (?, ?)",
+                    (host, at + 1.0 / rate),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return at - now
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        _, sem = self._limits(host)
+        rate, _ = self.overrides.get(host, (self.rate, self.max_in_flight))
+        started = time.monotonic()
+        with sem:
+            time.sleep(self._claim(host, rate))
+            METRICS.observe("politeness_wait_seconds", time.monotonic() - started, host=host)
+            yield
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._conn.close()
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from services.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+# record layout (self-delimiting, so the index can always be rebuilt):
+#   b"JSREC1 <meta_len> <body_len>\n" + meta JSON + zlib(body)
+MAGIC = b"JSREC1"
+
+
+class ReplayMissError(requests.RequestException):
+    """Replay asked for a request that is not in the recording."""
+
+
+def request_key(method: str, url: str, params=None, json_body=None, data=None) -> str:
+    """
+    Identity of a request in a recording: method, full URL with query, and
+    a hash of the body for POSTs (so different LLM prompts don't collide).
+    """
+    full = requests.Request(method, url, params=params).prepare().url
+    key = f"{method.upper()} {full}"
+    if json_body is not None:
+        data = json.dumps(json_body, sort_keys=True, ensure_ascii=False)
+    if data:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        key += " " + hashlib.sha256(data).hexdigest()[:16]
+    return key
+
+
+def snapshot_state(record_path: str, stores: dict[str, str]) -> None:
+    """
+    Copy the SQLite stores a recorded run starts from (name -> path, e.g.
+    the seen store) next to the recording as ``<record>.<name>.db``, so a
+    replay sees the same known jobs and fetches the same pages. A store
+    that does not exist yet is snapshotted empty; an existing snapshot
+    (appending to a recording) is kept.
+    """
+    for name, path in stores.items():
+        target = Path(f"{record_path}.{name}.db")
+        if target.exists():
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        dst = sqlite3.connect(target)
+        try:
+            if path != ":memory:" and Path(path).exists():
+                src = sqlite3.connect(path)
+                try:
+                    src.backup(dst)
+                finally:
+                    src.close()
+        finally:
+            dst.close()
+
+
+def restore_state(record_path: str, names, workdir: str) -> dict[str, str | None]:
+    """
+    Working copies of a recording's store snapshots in ``workdir`` (so
+    replays never change them): name -> path, or None without a snapshot.
+    """
+    restored = {}
+    for name in names:
+        snapshot = Path(f"{record_path}.{name}.db")
+        if not snapshot.exists():
+            restored[name] = None
+            continue
+        restored[name] = str(Path(workdir) / snapshot.name)
+        shutil.copyfile(snapshot, restored[name])
+    return restored
+
+
+class TrafficRecorder:
+    """
+    Append-only archive of raw HTTP responses (WARC-like): one file of
+    compressed, self-delimiting records plus a ``.idx`` JSON index of
+    request key -> offset written on close.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._index: dict[str, int] = {}
+        if self.path.exists():
+            # appending to an earlier recording: keep its entries in the index
+            archive = TrafficArchive(path)
+            self._index = dict(archive._index)
+            archive.close()
+        self._file = open(self.path, "ab")
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def add(self, key: str, resp: requests.Response) -> None:
+        meta = json.dumps(
+            {
+                "key": key,
+                "url": resp.url,
+                "status": resp.status_code,
+                "headers": dict(resp.headers),
+                "encoding": resp.encoding,
+                "at": time.time(),
+            },
+            ensure_ascii=False,
+        ).encode("utf-8")
+        body = zlib.compress(resp.content, 6)
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(b"%s %d %d\n" % (MAGIC, len(meta), len(body)))
+            self._file.write(meta)
+            self._file.write(body)
+            # a repeated request replays its latest response
+            self._index[key] = offset
+            self.records += 1
+        METRICS.inc("recorded_responses_total")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+            tmp = self.path.with_name(self.path.name + ".idx.tmp")
+            tmp.write_text(json.dumps(self._index), encoding="utf-8")
+            os.replace(tmp, self.path.with_name(self.path.name + ".idx"))
+        logger.info("Recorded %s responses to %s", self.records, self.path)
+
+
+class TrafficArchive:
+    """Read side of a recording: memory-mapped, records decoded on demand."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._fh = open(self.path, "rb")
+        # mmap refuses empty files; bytes offer the same find/slice API
+        if self.path.stat().st_size:
+            self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = b""
+        idx = self.path.with_name(self.path.name + ".idx")
+        if idx.exists() and idx.stat().st_mtime >= self.path.stat().st_mtime:
+            self._index = json.loads(idx.read_text(encoding="utf-8"))
+        else:
+            # interrupted recording: rebuild the index by walking the records
+            self._index = self._scan()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def _scan(self) -> dict[str, int]:
+        index = {}
+        offset = 0
+        while offset < len(self._map):
+            end = self._map.find(b"\n", offset)
+            if end < 0:
+                break
+            magic, meta_len, body_len = self._map[offset:end].split()
+            if magic != MAGIC or end + 1 + int(meta_len) + int(body_len) > len(self._map):
+                break  # truncated tail
+            meta = json.loads(self._map[end + 1:end + 1 + int(meta_len)])
+            index[meta["key"]] = offset
+            offset = end + 1 + int(meta_len) + int(body_len)
+        return index
+
+    def response(self, key: str) -> requests.Response:
+        offset = self._index.get(key)
+        if offset is None:
+            raise ReplayMissError(f"not in recording: {key}")
+        end = self._map.find(b"\n", offset)
+        _, meta_len, body_len = self._map[offset:end].split()
+        start = end + 1 + int(meta_len)
+        meta = json.loads(self._map[end + 1:start])
+
+        resp = requests.Response()
+        resp.status_code = meta["status"]
+        resp.headers = CaseInsensitiveDict(meta["headers"])
+        # the body is stored decoded; the original framing headers no longer apply
+        for name in ("Content-Encoding", "Transfer-Encoding"):
+            resp.headers.pop(name, None)
+        resp.encoding = meta["encoding"]
+        resp.url = meta["url"]
+        resp._content = zlib.decompress(self._map[start:start + int(body_len)])
+        return resp
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._fh.close()
+
+
+class RecordingTransport:
+    """
+    Wraps an :class:`HttpTransport` and records every final response
+    (after its retries) except for URLs starting with one of ``skip``,
+    e.g. the Telegram API whose URLs embed the bot token.
+    """
+
+    def __init__(self, inner, recorder: TrafficRecorder, skip: tuple[str, ...] = ()):
+        self.inner = inner
+        self.recorder = recorder
+        self.skip = tuple(s for s in skip if s)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        resp = self.inner.request(method, url, **kwargs)
+        if not url.startswith(self.skip):
+            key = request_key(method, url, kwargs.get("params"), kwargs.get("json"), kwargs.get("data"))
+            self.recorder.add(key, resp)
+        return resp
+
+    def close(self) -> None:
+        self.inner.close()
+        self.recorder.close()
+
+
+class ReplayTransport:
+    """
+    Transport that serves responses from a :class:`TrafficArchive`:
+    no network, no retries, no sleeps. Unrecorded requests raise
+    :class:`ReplayMissError`, which callers already treat as a failed fetch.
+    """
+
+    def __init__(self, archive: TrafficArchive):
+        self.archive = archive
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        key = request_key(method, url, kwargs.get("params"), kwargs.get("json"), kwargs.get("data"))
+        try:
+            resp = self.archive.response(key)
+        except ReplayMissError:
+            METRICS.inc("replay_requests_total", result="miss")
+            raise
+        METRICS.inc("replay_requests_total", result="hit")
+        return resp
+
+    def close(self) -> None:
+        self.archive.close()
@@ -0,0 +1,220 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from services.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# safe to resend after the server may have acted on the request
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without touching the network while a host's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker: after ``threshold`` consecutive failures the host is
+    short-circuited for ``reset_after`` seconds, then one probe is let through.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 60.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            opened = self._opened_at.get(host)
+            if opened is None:
+                return True
+            if time.monotonic() - opened >= self.reset_after:
+                # half-open: let one probe through, re-open on its failure
+                self._opened_at[host] = time.monotonic()
+                self._failures[host] = self.threshold - 1
+                return True
+            return False
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str) -> bool:
+        """Count a failure; return True if the circuit is now open."""
+        with self._lock:
+            count = self._failures.get(host, 0) + 1
+            self._failures[host] = count
+            if count >= self.threshold:
+                if host not in self._opened_at:
+                    logger.warning("Circuit opened for %s after %s failures", host, count)
+                    METRICS.inc("circuit_open_total", host=host)
+                self._opened_at[host] = time.monotonic()
+                return True
+            return False
+
+
+class HttpTransport:
+    """
+    Shared HTTP layer for scrapers and API clients: pooled connections,
+    bounded retries with jittered exponential backoff, ``Retry-After``
+    support, fail-fast on non-retryable 4xx and a per-host circuit breaker.
+
+    Non-retryable responses are returned as-is so callers keep using
+    ``raise_for_status``; network errors are raised after the last attempt.
+    Non-idempotent requests (POST) are only resent when the connection was
+    never made: a read timeout may mean the server already acted on them.
+    A 429 with a retry delay is rate limiting and does not trip the breaker.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 20.0,
+        max_retry_after: float = 120.0,
+        breaker: CircuitBreaker | None = None,
+        pool_size: int = 10,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_config(cls, cfg) -> "HttpTransport":
+        return cls(
+            max_retries=cfg.http_max_retries,
+            breaker=CircuitBreaker(
+                threshold=cfg.http_breaker_threshold,
+                reset_after=cfg.http_breaker_reset,
+            ),
+            pool_size=max(cfg.fetch_workers, 10),
+        )
+
+    # =====================================================
+    # public
+    # =====================================================
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc.lower()
+        kwargs.setdefault("timeout", 30)
+
+        for attempt in range(self.max_retries + 1):
+
+            if not self.breaker.allow(host):
+                METRICS.inc("http_requests_total", host=host, status="circuit_open")
+                raise CircuitOpenError(f"circuit open for {host}")
+
+            if attempt:
+                METRICS.inc("http_retries_total", host=host)
+
+            started = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                METRICS.inc("http_requests_total", host=host, status="error")
+                opened = self.breaker.record_failure(host)
+                if opened or attempt == self.max_retries:
+                    raise
+                if method.upper() not in IDEMPOTENT_METHODS and not self._never_sent(exc):
+                    raise
+                wait = self._backoff(attempt)
+                logger.warning(
+                    "%s %s failed (%s), retry %s in %.1fs",
+                    method, url, exc, attempt + 1, wait,
+                )
+                METRICS.inc("http_backoff_seconds_total", wait, host=host)
+                time.sleep(wait)
+                continue
+
+            METRICS.observe("http_request_seconds", time.perf_counter() - started, host=host)
+            METRICS.inc("http_requests_total", host=host, status=resp.status_code)
+            METRICS.inc("http_bytes_total", len(resp.content), host=host)
+
+            if resp.status_code not in RETRY_STATUSES:
+                self.breaker.record_success(host)
+                return resp
+
+            wait = self._retry_after(resp)
+            # told to slow down, not failing: leave the breaker alone
+            opened = False if resp.status_code == 429 and wait is not None else self.breaker.record_failure(host)
+            if wait is None:
+                wait = self._backoff(attempt)
+            if opened or attempt == self.max_retries or wait > self.max_retry_after:
+                return resp
+
+            logger.warning(
+                "%s %s -> %s, retry %s in %.1fs",
+                method, url, resp.status_code, attempt + 1, wait,
+            )
+            resp.close()
+            METRICS.inc("http_backoff_seconds_total", wait, host=host)
+            time.sleep(wait)
+
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        self.session.close()
+
+    # =====================================================
+    # helpers
+    # =====================================================
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    @staticmethod
+    def _never_sent(exc: requests.RequestException) -> bool:
+        """True when the request failed before a connection was made."""
+        if isinstance(exc, requests.ConnectTimeout):
+            return True
+        reason = getattr(exc.args[0] if exc.args else None, "reason", None)
+        return isinstance(reason, NewConnectionError)
+
+    @staticmethod
+    def _retry_after(resp: requests.Response) -> float | None:
+        value = resp.headers.get("Retry-After")
+        if value:
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                try:
+                    return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+                except (TypeError, ValueError):
+                    pass
+        if resp.status_code == 429:
+            # Telegram reports the delay in the JSON body instead of a header
+            try:
+                return float(resp.json()["parameters"]["retry_after"])
+            except (ValueError, KeyError, TypeError):
+                pass
+        return None
@@ -1,41 +1,314 @@
+import time
 from abc import ABC, abstractmethod
+from html import escape
+
+from config import AppConfig
+from net.fetcher import FetchEngine
+from services.metrics import METRICS
+from services.pipeline import Stage, stream
 
 class BaseScraper(ABC):
-    def __init__(self, proposal_service, telegram_client):
+    source = ""
+    # KeywordMatcher applied to list-page titles (None = the scraper matches on its own)
+    matcher = None
+    # RelevanceScorer for this source's keywords (None = no ranking)
+    scorer = None
+
+    def __init__(self, proposal_service, telegram_client, seen_store=None, fetcher=None, dedup=None):
         self.proposal_service = proposal_service
         self.telegram = telegram_client
+        self.seen_store = seen_store
+        self.dedup = dedup
+        # standalone use (plugins, scripts): a private engine without the disk
+        # cache, shut down by close()
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher or FetchEngine.from_config(AppConfig(), lightweight=True)
+        # monotonic time after which iter_jobs stops paging (None = no limit)
+        self.deadline = None
+        # page limit override for polling (None = the scraper's MAX_PAGES)
+        self.max_pages = None
+        # list items not seen before, counted across runs of this instance
+        self.new_items = 0
+        # relevance cut applied before enrichment (0 = keep everything)
+        self.top_k = 0
+        self.min_score = 0.0
+        # seconds of streamed jobs ranked together for top_k (0 = the whole run)
+        self.relevance_window = 0.0
+        # scrapers.listing.ListingFilter on list-page metadata (None = off)
+        self.listing_filter = None
+        # storage.archive.JobArchive receiving every scraped job (None = off)
+        self.archive = None
+        # services.subscribers.SubscriberIndex to fan alerts out to (None = TELEGRAM_CHAT_ID only)
+        self.subscribers = None
+        # urls handed out by the current run()/scrape(), so a retried pending job
+        # listed twice (two categories, two pages) is only processed once
+        self._claimed = None
 
     @abstractmethod
-    def scrape(self):
+    def iter_jobs(self):
+        """Yield matching ``Job`` objects lazily, as they are scraped."""
         ...
 
+    def close(self):
+        """Shut down the fetch engine if the scraper created its own."""
+        if self._owns_fetcher:
+            self._owns_fetcher = False
+            self.fetcher.close()
+            self.fetcher.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def scrape(self):
+        self._claimed = set()
+        try:
+            return list(self.iter_jobs())
+        finally:
+            self._claimed = None
+
+    def _timed(self, stage):
+        return METRICS.timer("stage_seconds", source=self.source, stage=stage)
+
+    def _count(self, outcome, n=1):
+        if n:
+            METRICS.inc("jobs_total", n, source=self.source, outcome=outcome)
+
+    def _expired(self):
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def _unseen(self, items):
+        """
+        Filter ``(title, url)`` pairs from one list page down to the ones not
+        yet settled in the seen store (new, or matched but never alerted).
+        """
+        fresh = list(items)
+        if self.seen_store is not None:
+            settled = self.seen_store.settled(self.source, [url for _, url in fresh])
+            fresh = [(title, url) for title, url in fresh if url not in settled]
+        if self._claimed is not None:
+            fresh = [(title, url) for title, url in fresh if url not in self._claimed]
+            self._claimed.update(url for _, url in fresh)
+        self.new_items += len(fresh)
+        return fresh
+
+    def _prefilter(self, items):
+        """
+        Drop list items (metadata dicts) rejected by ``listing_filter`` so
+        their detail pages are never fetched.
+        """
+        if self.listing_filter is None:
+            return list(items)
+        kept = [item for item in items if self.listing_filter.accepts(item)]
+        self._count("prefiltered", len(items) - len(kept))
+        return kept
+
+    def _stale(self, items):
+        """True when every item on a (newest-first) list page is past ``max_age_hours``."""
+        return (
+            self.listing_filter is not None
+            and bool(items)
+            and all(self.listing_filter.too_old(item.get("posted_at")) for item in items)
+        )
+
+    def _remember(self, items, pending=False):
+        """
+        Record handled ``(title, url)`` pairs so later runs skip them.
+        ``pending`` ones (matched jobs) are retried until :meth:`_delivered`
+        or :meth:`_settle` closes them.
+        """
+        if self.seen_store is not None:
+            self.seen_store.touch_many(self.source, [(url, title) for title, url in items], pending)
+
+    def _settle(self, jobs):
+        """Close pending jobs dropped on purpose, so later runs skip them."""
+        if self.seen_store is not None:
+            self.seen_store.settle(self.source, [job.url for job in jobs])
+
     def enrich_and_notify(self, jobs):
-        for job in jobs:
+        for job in self._enriched(jobs):
             try:
-                #self.proposal_service.generate(job)
-                msg = f"""🎯 <b>فرصة عمل جديده</b>
-    
-    <b>العنوان:</b> {job.title}
-    🔗 <a href="{job.url}">فتح الوظيفة</a>
-    
-    <b>ملخص:</b>
-    <pre>{job.description}</pre>"""
-                    #f"""🎯 <b>فرصة جديدة من خمسات</b>
-    
-    #<b>العنوان:</b> {job.title}
-    #🔗 <a href="{job.url}">فتح الوظيفة</a>
-    
-    #<b>ملخص:</b>
-    #<pre>{job.summary}</pre>
-    
-    #<b>خطة العمل:</b>
-    #<pre>{job.plan}</pre>
-    
-    #<b>البروبوزال:</b>
-    #<pre>{job.proposal}</pre>
-    #"""
-
-
-                self.telegram.send(msg)
+                self._notify(job)
             except Exception as e:
                 print(e)
+
+    def run(self, queue_size=8):
+        """
+        Streaming counterpart of ``enrich_and_notify(scrape())``: scraping,
+        enrichment and notification overlap, joined by bounded queues, so
+        the first alert goes out as soon as the first matching job is
+        scraped (and enriched). Returns the number of jobs queued for Telegram.
+        """
+        self._claimed = set()
+        try:
+            return stream(
+                self._enriched(self.iter_jobs()),
+                [Stage("notify", self._notify)],
+                maxsize=queue_size,
+            )
+        finally:
+            self._claimed = None
+
+    def _enriched(self, jobs):
+        # a list is ranked as one batch; a generator is ranked as jobs arrive
+        batch = isinstance(jobs, list)
+        if self.archive is not None:
+            jobs = self.archive.tap(jobs)
+        jobs = (job for job in jobs if not self._notified(job))
+        if self.dedup is not None:
+            jobs = (job for job in jobs if self._admit(job))
+        ranked = {}
+        if self.scorer is not None:
+            jobs = self._tap(jobs, ranked)
+            if batch:
+                jobs = self.scorer.rank(list(jobs), self.top_k, self.min_score)
+            else:
+                jobs = self.scorer.select(jobs, self.top_k, self.min_score, window=self.relevance_window)
+        if self.proposal_service is not None and self.proposal_service.enabled:
+            jobs = self.proposal_service.generate_many(jobs)
+        return self._settle_rest(jobs, ranked)
+
+    @staticmethod
+    def _tap(jobs, seen):
+        for job in jobs:
+            seen[job.url] = job
+            yield job
+
+    def _settle_rest(self, jobs, ranked):
+        # whatever the scorer cut never comes out: settle it once the run drains
+        for job in jobs:
+            ranked.pop(job.url, None)
+            yield job
+        self._settle(ranked.values())
+
+    def _admit(self, job):
+        """
+        Near-duplicate check. A duplicate of a job whose alert already went
+        out gets a short follow-up with its link instead of a second alert.
+        """
+        found = self.dedup.check(job, self.source)
+        if found is None:
+            return True
+        original_url, merged = found
+        self._settle([job])
+        if not merged:
+            self._notify_duplicate(job, original_url)
+        return False
+
+    def _notify_duplicate(self, job, original_url):
+        msg = f"""🔁 <b>نفس الطلب على رابط آخر</b>
+
+<b>العنوان:</b> {escape(job.title)}
+🔗 <a href="{escape(job.url)}">فتح الوظيفة</a>
+↩️ <a href="{escape(original_url)}">الرابط الأصلي</a>"""
+        for chat_id in self._recipients(job) or ():
+            self.telegram.send(msg, chat_id=chat_id)
+        self._count("duplicate_followup")
+
+    def _recipients(self, job):
+        """Chat ids to alert for ``job`` ([None] = TELEGRAM_CHAT_ID; empty = nobody follows it)."""
+        if self.subscribers is None:
+            return [None]
+        return [sub.chat_id for sub in self.subscribers.route(job)]
+
+    def _notified(self, job):
+        return self.seen_store is not None and self.seen_store.is_notified(self.source, job.url)
+
+    def _notify(self, job):
+        if self._notified(job):
+            return None
+        chat_ids = self._recipients(job)
+        if not chat_ids:
+            self._count("unrouted")
+            self._settle([job])
+            return None
+        if self.subscribers is not None:
+            METRICS.inc("subscriber_alerts_total", len(chat_ids), source=self.source)
+
+        if self.dedup is not None:
+            # duplicates queued for this alert (by any process); later ones get a follow-up
+            job.alt_urls.extend(u for u in self.dedup.release(job.url) if u not in job.alt_urls)
+        title = escape(job.title)
+        links = "\n".join(
+            [f'🔗 <a href="{escape(job.url)}">فتح الوظيفة</a>']
+            + [f'🔁 <a href="{escape(u)}">نفس الطلب على رابط آخر</a>' for u in job.alt_urls]
+        )
+        if job.proposal:
+            msg = f"""🎯 <b>فرصة جديدة</b>
+
+<b>العنوان:</b> {title}{self._fit(job)}{self._details(job)}
+{links}
+
+<b>ملخص:</b>
+<pre>{escape(job.summary)}</pre>
+
+<b>خطة العمل:</b>
+<pre>{escape(job.plan)}</pre>
+
+<b>البروبوزال:</b>
+<pre>{escape(job.proposal)}</pre>"""
+        else:
+            msg = f"""🎯 <b>فرصة عمل جديده</b>
+
+<b>العنوان:</b> {title}{self._fit(job)}{self._details(job)}
+{links}
+
+<b>ملخص:</b>
+<pre>{escape(job.description)}</pre>"""
+
+        # queued, not sent: mark the job notified once a delivery succeeds
+        for chat_id in chat_ids:
+            self.telegram.send(msg, chat_id=chat_id, callback=lambda ok: self._delivered(job, ok))
+        return job
+
+    def _fit(self, job):
+        """The relevance score as one extra message line ("" when no scorer ran)."""
+        return f"\n<b>التوافق:</b> {job.score:.0%}" if self.scorer is not None else ""
+
+    @staticmethod
+    def _details(job):
+        """List-page metadata as one extra message line ("" when none is known)."""
+        parts = []
+        if job.budget_max is not None:
+            low, high = job.budget_min or job.budget_max, job.budget_max
+            parts.append(f"${low:g}" if low == high else f"${low:g} - ${high:g}")
+        if job.bids is not None:
+            parts.append(f"{job.bids} عروض")
+        if job.client:
+            parts.append(escape(job.client))
+        return "\n<b>التفاصيل:</b> " + " · ".join(parts) if parts else ""
+
+    def _delivered(self, job, ok):
+        if ok and self.seen_store is not None:
+            self.seen_store.mark_notified(self.source, job.url)
+
+
+class PagedScraper(ABC):
+    """
+    Optional mixin for scrapers that can split a crawl into list-page and
+    detail tasks, so the sharded work queue can spread one source over many
+    workers. Scrapers without it run as one whole-source ``crawl`` task.
+
+    Mix it in before the base class: ``class X(PagedScraper, BaseScraper)``.
+    """
+
+    @classmethod
+    @abstractmethod
+    def list_tasks(cls):
+        """First list-page tasks of one crawl (JSON-serialisable)."""
+        ...
+
+    @abstractmethod
+    def crawl_page(self, task):
+        """
+        Process one list-page task and record it in the seen store (matches
+        as pending): returns the matching items and the next page task (or None).
+        """
+        ...
+
+    @abstractmethod
+    def fetch_job(self, item):
+        """Fetch the detail page of one item from :meth:`crawl_page` into a ``Job``."""
+        ...
@@ -1,12 +1,15 @@
 import os
-import time
-import random
+import re
 import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 from urllib.parse import urljoin
 
-from scrapers.base import BaseScraper
+from scrapers.base import BaseScraper, PagedScraper
+from scrapers.listing import parse_count, parse_posted
+from scrapers.parsing import extract
 from domain.job import Job
+from services.keyword_matcher import KeywordMatcher
+from services.scoring import RelevanceScorer
 
 BASE_URL = "https://khamsat.com"
 REQUESTS_URL = "https://khamsat.com/community/requests"
@@ -23,6 +26,10 @@ HEADERS = {
     "Accept-Language": "ar,en;q=0.9",
 }
 
+# الأجزاء اللي بنقراها بس من الصفحة، الباقي مش بيتبني أصلا
+REQUEST_ROWS = SoupStrainer("tr", id=re.compile(r"^forum_post-"))
+REQUEST_BODY = SoupStrainer("article")
+
 KEYWORDS = [
     "ترجمة", "مترجم", "translate", "translation",
     "تفريغ", "transcription", "نسخ صوت", "تحويل صوت", "ملفات صوتية", "تفريغ فيديو",
@@ -34,101 +41,156 @@ KEYWORDS = [
     "توليد صور", "توليد محتوى", "prompt", "برمجة بوت", "openai"
 ]
 
+# أوزان الكلمات في حساب التوافق (الافتراضي 1.0): الكلمات القصيرة الملتبسة أقل
+KEYWORD_WEIGHTS = {
+    "vo": 0.3, "ml": 0.5, "ai": 0.6, "word": 0.4, "pdf": 0.6, "api": 0.7,
+    "script": 0.7, "بوت": 0.7, "تفريغ ملفات pdf": 1.5, "voice over": 1.3,
+}
+
+MATCHER = KeywordMatcher(KEYWORDS)
+SCORER = RelevanceScorer(MATCHER, KEYWORD_WEIGHTS)
+
 
-class KhamsatScraper(BaseScraper):
-    def __init__(self, proposal_service, telegram_client):
-        super().__init__(proposal_service, telegram_client)
+class KhamsatScraper(PagedScraper, BaseScraper):
+    source = "khamsat"
+    matcher = MATCHER
+    scorer = SCORER
 
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+    def __init__(self, proposal_service, telegram_client, seen_store=None, fetcher=None, dedup=None):
+        super().__init__(proposal_service, telegram_client, seen_store, fetcher, dedup)
 
-    def scrape(self):
+    def iter_jobs(self):
         """
-        يرجّع قائمة domain.job.Job بدون Telegram ولا CSV.
+        يولّد domain.job.Job واحدة واحدة بدون Telegram ولا CSV.
         """
-        jobs: list[Job] = []
+        found = 0
         seen_links = set()
 
-        for page_num in range(1, MAX_PAGES + 1):
-            if len(jobs) >= MAX_ITEMS_PER_RUN:
-                break
-
-            url = REQUESTS_URL if page_num == 1 else f"{REQUESTS_URL}?page={page_num}"
-            print(f"\n🌐 Fetching list page {page_num}: {url}")
-
-            try:
-                html = self._fetch(url)
-            except Exception as e:
-                print(f"❌ Error fetching list page {url}: {e}")
-                break
-
-            if not html:
-                break
-
-            parsed_jobs = self._parse_list(html)
-            print(f"📋 Found {len(parsed_jobs)} jobs on this page")
-
-            if not parsed_jobs:
+        task = self.list_tasks()[0]
+        while task is not None:
+            if self._expired():
+                print("⏱️ Source timeout reached, stopping.")
                 break
 
-            for title, link in parsed_jobs:
-                if len(jobs) >= MAX_ITEMS_PER_RUN:
-                    break
-
-                if link in seen_links:
-                    continue
-                seen_links.add(link)
-
-                if not self._matches(title):
-                    continue
-
-                print(f"🔍 NEW relevant job: {title[:60]}...")
-                self._sleep(1.5, 3.0)
+            matched, task = self.crawl_page(task, seen_links)
+            for job in self.fetcher.imap(self.fetch_job, matched):
+                found += 1
+                yield job
 
-                desc = self._fetch_description(link)
-                jobs.append(Job(title, link, desc))
-
-        if not jobs:
+        if not found:
             print("ℹ️ No new jobs from Khamsat today.")
 
-        return jobs
+    @classmethod
+    def list_tasks(cls):
+        # room = كام طلب لسه مسموح بيه في التشغيل ده (MAX_ITEMS_PER_RUN)
+        return [{"page": 1, "room": MAX_ITEMS_PER_RUN}]
+
+    def crawl_page(self, task, seen_links=None):
+        """
+        صفحة طلبات واحدة: يرجّع (الطلبات المطابقة, مهمة الصفحة التالية أو None).
+        الصفحة بتتسجل في seen store، والمطابق منها pending لحد ما التنبيه يوصل.
+        """
+        page_num, room = task["page"], task["room"]
+        url = REQUESTS_URL if page_num == 1 else f"{REQUESTS_URL}?page={page_num}"
+        print(f"\n🌐 Fetching list page {page_num}: {url}")
 
-    def _fetch(self, url, max_retries=5):
-        backoff = 3
-        for attempt in range(1, max_retries + 1):
-            try:
-                print(f"[GET] {url} (attempt {attempt})")
-                r = self.session.get(url, timeout=20)
-                # تعامل مع 5xx بباك أوف بسيط
-                if 500 <= r.status_code < 600:
-                    if attempt < max_retries:
-                        wait = backoff + random.uniform(0, 2)
-                        print(f"[!] {r.status_code} from server, retry after {wait:.1f}s...")
-                        time.sleep(wait)
-                        backoff *= 2
+        try:
+            with self._timed("list_fetch"):
+                html = self._fetch(url)
+        except Exception as e:
+            print(f"❌ Error fetching list page {url}: {e}")
+            return [], None
+
+        if not html:
+            return [], None
+
+        with self._timed("list_parse"):
+            parsed_jobs = self.fetcher.parse(self._parse_list, html)
+        print(f"📋 Found {len(parsed_jobs)} jobs on this page")
+
+        if not parsed_jobs:
+            return [], None
+
+        fresh = self._unseen([(j["title"], j["url"]) for j in parsed_jobs])
+        self._count("known", len(parsed_jobs) - len(fresh))
+        if not fresh:
+            print("⏹️ Page contains only known jobs, stopping.")
+            return [], None
+
+        by_url = {j["url"]: j for j in parsed_jobs}
+        handled = []
+        matched = []
+        with self._timed("match"):
+            for title, link in fresh:
+                if seen_links is not None:
+                    if link in seen_links:
                         continue
-                    else:
-                        print(f"[!] Server error {r.status_code} after {max_retries} attempts for {url}")
-                        r.raise_for_status()
-
-                r.raise_for_status()
-                return r.text
-
-            except requests.RequestException as e:
-                if attempt < max_retries:
-                    wait = backoff + random.uniform(0, 2)
-                    print(f"[!] Network/HTTP error {e}, retry after {wait:.1f}s...")
-                    time.sleep(wait)
-                    backoff *= 2
-                    continue
-                print(f"[!] Failed after {max_retries} attempts for {url}: {e}")
-                return ""
-
-    def _parse_list(self, html):
+                    seen_links.add(link)
+
+                keywords = self.matcher.find(title)
+                if keywords:
+                    matched.append(dict(by_url[link], keywords=keywords))
+                else:
+                    handled.append((title, link))
+
+        self._count("matched", len(matched))
+        self._count("skipped", len(handled))
+
+        # الفلترة بالبيانات الظاهرة في القائمة قبل جلب صفحات التفاصيل
+        kept = self._prefilter(matched)
+        kept_urls = {j["url"] for j in kept}
+        handled.extend((j["title"], j["url"]) for j in matched if j["url"] not in kept_urls)
+        matched = kept
+
+        # الحد الأقصى للتشغيل يأخذ الأعلى توافقا وليس الأسبق وصولا
+        if len(matched) > room:
+            scores = self.scorer.score_texts([j["title"] for j in matched])
+            order = sorted(range(len(matched)), key=lambda i: -scores[i])
+            matched = [matched[i] for i in sorted(order[:room])]
+            self._count("capped", len(order) - room)
+        # المطابق بيفضل pending لحد ما التنبيه يتبعت، عشان لو فشل يترجع له التشغيل الجاي
+        self._remember(handled)
+        self._remember([(j["title"], j["url"]) for j in matched], pending=True)
+
+        for j in matched:
+            print(f"🔍 NEW relevant job: {j['title'][:60]}...")
+
+        room -= len(matched)
+        next_task = None
+        # الصفحات مرتبة من الأحدث: لو كلها أقدم من MAX_AGE_HOURS نتوقف
+        if self._stale(parsed_jobs):
+            print("⏹️ Page is older than MAX_AGE_HOURS, stopping.")
+        elif room > 0 and page_num < (self.max_pages or MAX_PAGES):
+            next_task = {"page": page_num + 1, "room": room}
+
+        return matched, next_task
+
+    def fetch_job(self, j):
+        desc = self._fetch_description(j["url"])
+        return Job(j["title"], j["url"], desc, source=self.source, matched_keywords=j["keywords"],
+                   client=j["client"], bids=j["bids"], posted_at=j["posted_at"])
+
+    def _fetch(self, url):
+        # retries, Retry-After و circuit breaker في HttpTransport
+        try:
+            print(f"[GET] {url}")
+            r = self.fetcher.get(url, headers=HEADERS, timeout=20)
+            r.raise_for_status()
+            return r.text
+        except requests.RequestException as e:
+            print(f"[!] Failed to fetch {url}: {e}")
+            return ""
+
+    @staticmethod
+    def _parse_list(html):
         """
-        يرجّع قائمة tuples (title, link) من صفحة الطلبات.
+        يرجّع قائمة dicts (title, url, client, bids, posted_at) من صفحة الطلبات.
+        عدد التعليقات على الطلب هو عدد العروض في خمسات.
         """
-        soup = BeautifulSoup(html, "html.parser")
+        return extract(html, KhamsatScraper._list_from, only=REQUEST_ROWS)
+
+    @staticmethod
+    def _list_from(soup):
         rows = soup.select("tr.forum_post[id^='forum_post-']")
         jobs = []
 
@@ -145,21 +207,34 @@ class KhamsatScraper(BaseScraper):
             if href.startswith("/"):
                 href = urljoin(BASE_URL, href)
 
-            jobs.append((title, href))
+            user = row.select_one("ul.details-list a.user")
+            stamp = row.select_one("ul.details-list span[title]")
+            comments = row.select_one("td.comments-td")
+
+            jobs.append({
+                "title": title,
+                "url": href,
+                "client": user.get_text(strip=True) if user else "",
+                "bids": parse_count(comments.get_text(" ", strip=True)) if comments else None,
+                "posted_at": parse_posted(stamp.get("title"), stamp.get_text(strip=True)) if stamp else None,
+            })
 
         return jobs
 
     def _fetch_description(self, url):
         try:
-            html = self._fetch(url)
-            if not html:
-                return ""
+            with self._timed("detail"):
+                return self.fetcher.get_parsed(url, self._parse_description, headers=HEADERS, timeout=20)
         except Exception as e:
             print(f"[!] Error fetching description from {url}: {e}")
             return ""
 
-        soup = BeautifulSoup(html, "html.parser")
+    @staticmethod
+    def _parse_description(html):
+        return extract(html, KhamsatScraper._description_from, only=REQUEST_BODY)
 
+    @staticmethod
+    def _description_from(soup):
         # article.replace_urls
         article = soup.select_one("article.replace_urls")
         if article:
@@ -176,10 +251,3 @@ class KhamsatScraper(BaseScraper):
                     return text
 
         return ""
-
-    def _matches(self, text):
-        t = text.lower()
-        return any(kw.lower() in t for kw in KEYWORDS)
-
-    def _sleep(self, min_s=2.0, max_s=4.0):
-        time.sleep(random.uniform(min_s, max_s))
@@ -0,0 +1,115 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+
+_ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_MONEY = re.compile(r"\$\s*(\d+(?:[.,]\d+)*)|(\d+(?:[.,]\d+)*)\s*\$")
+
+# (unit words, seconds); dual forms (ساعتين) mean 2 of the unit
+_UNITS = [
+    (("ثانية", "ثواني", "ثوان", "ثانيتين"), 1),
+    (("دقيقة", "دقائق", "دقيقتين"), 60),
+    (("ساعة", "ساعات", "ساعتين"), 3600),
+    (("يوم", "أيام", "ايام", "يومين"), 86400),
+    (("أسبوع", "أسابيع", "اسبوع", "اسابيع", "أسبوعين", "اسبوعين"), 7 * 86400),
+    (("شهر", "أشهر", "شهور", "اشهر", "شهرين"), 30 * 86400),
+    (("سنة", "سنوات", "سنتين"), 365 * 86400),
+]
+
+
+def _number(text: str) -> float | None:
+    m = _NUMBER.search(text.translate(_ARABIC_DIGITS))
+    if not m:
+        return None
+    return float(m.group(0).replace(",", ""))
+
+
+def parse_count(text: str) -> int | None:
+    """First integer in ``text`` (Arabic-Indic digits allowed)."""
+    n = _number(text)
+    return int(n) if n is not None else None
+
+
+def parse_budget(text: str) -> tuple[float | None, float | None]:
+    """``"$25.00 - $50.00"`` -> ``(25.0, 50.0)``; a single amount -> ``(x, x)``."""
+    amounts = [
+        float((a or b).replace(",", ""))
+        for a, b in _MONEY.findall(text.translate(_ARABIC_DIGITS))
+    ]
+    if not amounts:
+        return None, None
+    return min(amounts), max(amounts)
+
+
+def parse_age(text: str) -> timedelta | None:
+    """Arabic relative time such as ``"منذ 3 ساعات"`` or ``"منذ ساعتين"``."""
+    text = text.translate(_ARABIC_DIGITS)
+    for words, seconds in _UNITS:
+        # dual forms first: "يومين" also contains "يوم"
+        for word in sorted(words, key=lambda w: not w.endswith("ين")):
+            if word in text:
+                if word.endswith("ين"):
+                    amount = 2.0
+                else:
+                    amount = _number(text) or 1.0
+                return timedelta(seconds=amount * seconds)
+    return None
+
+
+def parse_datetime(value: str) -> datetime | None:
+    """Site timestamps like ``"2024-05-01 10:20:30"`` (taken as UTC)."""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%d"):
+        try:
+            dt = datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return None
+
+
+def parse_posted(stamp: str | None, text: str = "") -> datetime | None:
+    """Posting time from an absolute ``stamp`` attribute, else relative ``text``."""
+    if stamp:
+        dt = parse_datetime(stamp)
+        if dt is not None:
+            return dt
+    age = parse_age(text) if text else None
+    return datetime.now(timezone.utc) - age if age is not None else None
+
+
+@dataclass(frozen=True)
+class ListingFilter:
+    """
+    Pre-filter on list-page metadata, applied before any detail fetch.
+    Unset limits (negative / zero) and unknown values always pass.
+    """
+
+    max_bids: int = -1
+    min_budget: float = 0.0
+    max_age_hours: float = 0.0
+
+    @classmethod
+    def from_config(cls, cfg) -> "ListingFilter | None":
+        f = cls(cfg.max_bids, cfg.min_budget, cfg.max_age_hours)
+        return f if f.active else None
+
+    @property
+    def active(self) -> bool:
+        return self.max_bids >= 0 or self.min_budget > 0 or self.max_age_hours > 0
+
+    def too_old(self, posted_at: datetime | None) -> bool:
+        if self.max_age_hours <= 0 or posted_at is None:
+            return False
+        return datetime.now(timezone.utc) - posted_at > timedelta(hours=self.max_age_hours)
+
+    def accepts(self, item: dict) -> bool:
+        bids = item.get("bids")
+        if self.max_bids >= 0 and bids is not None and bids > self.max_bids:
+            return False
+        budget = item.get("budget_max")
+        if self.min_budget > 0 and budget is not None and budget < self.min_budget:
+            return False
+        return not self.too_old(item.get("posted_at"))
+
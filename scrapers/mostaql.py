@@ -1,14 +1,15 @@
-import time
-import random
 import logging
-from typing import Iterable
+from typing import Iterator
 
-import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 from urllib.parse import urljoin
 
-from .base import BaseScraper
+from .base import BaseScraper, PagedScraper
+from .listing import parse_budget, parse_count, parse_posted
+from .parsing import extract
 from domain.job import Job
+from services.keyword_matcher import KeywordMatcher
+from services.scoring import RelevanceScorer
 
 
 logger = logging.getLogger(__name__)
@@ -25,19 +26,31 @@ CATEGORY_URLS = [
 ]
 
 MAX_PAGES = 15
-MAX_RETRIES = 5
 
+# spelling variants (ى/ي, ة/ه, أ/إ/ا, case) are folded by the matcher
 KEYWORDS = [
-    "تحويل pdf", "تحويل PDF", "pdf لنصوص",
+    "تحويل pdf", "pdf لنصوص",
     "ترجمة", "مترجم",
-    "تعليق صوتى", "تعليق صوتي",
-    "لغة عربية", "لغة انجليزية", "لغة إنجليزية",
+    "تعليق صوتي",
+    "لغة عربية", "لغة إنجليزية",
     "ocr", "معالجة الصور",
     "ذكاء اصطناعي", "تعلم الآلة",
     "python", "بايثون",
     "web scraping", "scraping", "جمع البيانات",
 ]
 
+# relevance weights per keyword (default 1.0)
+KEYWORD_WEIGHTS = {
+    "web scraping": 1.5, "scraping": 1.2, "ocr": 1.2, "pdf لنصوص": 1.3,
+}
+
+MATCHER = KeywordMatcher(KEYWORDS)
+SCORER = RelevanceScorer(MATCHER, KEYWORD_WEIGHTS)
+
+# subtrees the parsers read; anything else in the page is never built
+PROJECT_ROWS = SoupStrainer("tr")
+PROJECT_BRIEF = SoupStrainer("div", id="project-brief")
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -48,67 +61,142 @@ HEADERS = {
 }
 
 
-class MostaqlScraper(BaseScraper):
+class MostaqlScraper(PagedScraper, BaseScraper):
     """Scraper for mostaql.com projects pages."""
 
-    def __init__(self, proposal_service, telegram_client):
-        super().__init__(proposal_service, telegram_client)
+    source = "mostaql"
+    matcher = MATCHER
+    scorer = SCORER
 
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+    def __init__(
+        self,
+        proposal_service,
+        telegram_client,
+        seen_store=None,
+        fetcher=None,
+        dedup=None,
+    ):
+        super().__init__(
+            proposal_service,
+            telegram_client,
+            seen_store,
+            fetcher,
+            dedup,
+        )
 
     # =====================================================
     # public
     # =====================================================
 
-    def scrape(self) -> list[Job]:
+    def iter_jobs(self) -> Iterator[Job]:
 
-        jobs: list[Job] = []
+        for task in self.list_tasks():
 
-        for category_url in CATEGORY_URLS:
+            logger.info("Scraping category %s", task["category"])
 
-            logger.info("Scraping category %s", category_url)
+            while task is not None:
 
-            for page in range(1, MAX_PAGES + 1):
+                if self._expired():
+                    logger.warning("Source timeout reached, stopping")
+                    return
 
-                html = self._fetch_projects_page(category_url, page)
+                matched, task = self.crawl_page(task)
 
-                if not html:
-                    break
+                yield from self.fetcher.imap(self.fetch_job, matched)
 
-                projects = self._parse_projects(html)
+    @classmethod
+    def list_tasks(cls) -> list[dict]:
 
-                logger.info(
-                    "Found %s projects on page %s",
-                    len(projects),
-                    page,
-                )
+        return [{"category": url, "page": 1} for url in CATEGORY_URLS]
+
+    def crawl_page(self, task: dict) -> tuple[list[dict], dict | None]:
+        """
+        One list page of one category: the matching projects and the next
+        page task (or None). The page is recorded in the seen store, the
+        matches as pending until their alert goes out.
+        """
+
+        category_url, page = task["category"], task["page"]
+
+        with self._timed("list_fetch"):
+            html = self._fetch_projects_page(category_url, page)
+
+        if not html:
+            return [], None
+
+        with self._timed("list_parse"):
+            projects = self.fetcher.parse(self._parse_projects, html)
+
+        logger.info(
+            "Found %s projects on page %s",
+            len(projects),
+            page,
+        )
+
+        if not projects:
+            return [], None
 
-                if not projects:
-                    break
+        fresh = self._unseen(
+            [(p["title"], p["project_url"]) for p in projects]
+        )
 
-                for proj in projects:
+        self._count("known", len(projects) - len(fresh))
 
-                    if not self._matches_keywords(proj["title"]):
-                        continue
+        if not fresh:
+            logger.info(
+                "Page %s contains only known projects, stopping",
+                page,
+            )
+            return [], None
+
+        by_url = {p["project_url"]: p for p in projects}
 
-                    description = self._fetch_project_description(
-                        proj["project_url"]
-                    )
+        matched: list[dict] = []
 
-                    jobs.append(
-                        Job(
-                            title=proj["title"],
-                            url=proj["project_url"],
-                            description=description,
-                        )
-                    )
+        with self._timed("match"):
+            for title, project_url in fresh:
+                keywords = self._matched_keywords(title)
+                if keywords:
+                    project = by_url[project_url]
+                    project["keywords"] = keywords
+                    matched.append(project)
 
-                    self._sleep(2, 4)
+        self._count("matched", len(matched))
+        self._count("skipped", len(fresh) - len(matched))
 
-                self._sleep(4, 7)
+        matched = self._prefilter(matched)
 
-        return jobs
+        pending = {p["project_url"] for p in matched}
+        self._remember([(t, u) for t, u in fresh if u not in pending])
+        self._remember([(p["title"], p["project_url"]) for p in matched], pending=True)
+
+        next_task = None
+
+        # pages are newest first: past max_age nothing newer follows
+        if self._stale(projects):
+            logger.info(
+                "Page %s is older than MAX_AGE_HOURS, stopping",
+                page,
+            )
+        elif page < (self.max_pages or MAX_PAGES):
+            next_task = {"category": category_url, "page": page + 1}
+
+        return matched, next_task
+
+    def fetch_job(self, project: dict) -> Job:
+
+        return Job(
+            title=project["title"],
+            url=project["project_url"],
+            description=self._fetch_project_description(project["project_url"]),
+            source=self.source,
+            matched_keywords=project["keywords"],
+            client=project["client"],
+            bids=project["bids"],
+            budget_min=project["budget_min"],
+            budget_max=project["budget_max"],
+            posted_at=project["posted_at"],
+        )
 
     # =====================================================
     # networking
@@ -122,38 +210,26 @@ class MostaqlScraper(BaseScraper):
 
         params = {"page": page} if page > 1 else {}
 
-        for attempt in range(1, MAX_RETRIES + 1):
-
-            try:
+        try:
 
-                resp = self.session.get(
-                    base_url,
-                    params=params,
-                    timeout=25,
-                )
-
-                if resp.status_code >= 500:
-                    raise requests.HTTPError(
-                        f"server error {resp.status_code}",
-                        response=resp,
-                    )
-
-                resp.raise_for_status()
-                return resp.text
-
-            except Exception as exc:
+            resp = self.fetcher.get(
+                base_url,
+                params=params,
+                headers=HEADERS,
+                timeout=25,
+            )
 
-                wait = self._backoff(attempt)
+            resp.raise_for_status()
+            return resp.text
 
-                logger.warning(
-                    "Fetch failed (%s page=%s attempt=%s): %s",
-                    base_url,
-                    page,
-                    attempt,
-                    exc,
-                )
+        except Exception as exc:
 
-                time.sleep(wait)
+            logger.warning(
+                "Fetch failed (%s page=%s): %s",
+                base_url,
+                page,
+                exc,
+            )
 
         return None
 
@@ -162,56 +238,68 @@ class MostaqlScraper(BaseScraper):
         project_url: str,
     ) -> str:
 
-        for attempt in range(1, MAX_RETRIES + 1):
-
-            try:
+        try:
 
-                resp = self.session.get(
+            with self._timed("detail"):
+                return self.fetcher.get_parsed(
                     project_url,
+                    self._parse_description,
+                    headers=HEADERS,
                     timeout=25,
                 )
 
-                resp.raise_for_status()
+        except Exception as exc:
 
-                soup = BeautifulSoup(resp.text, "html.parser")
+            logger.warning(
+                "Project fetch failed (%s): %s",
+                project_url,
+                exc,
+            )
 
-                brief = soup.find("div", id="project-brief")
-                if not brief:
-                    return ""
+            return ""
 
-                body = brief.find("div", class_="carda__body") or brief
-                content = (
-                    body.find("div", class_="text-wrapper-div")
-                    or body
-                )
+    # =====================================================
+    # parsing
+    # =====================================================
 
-                return content.get_text(
-                    separator=" ",
-                    strip=True,
-                )
+    @staticmethod
+    def _parse_description(html: str) -> str:
 
-            except Exception as exc:
+        return extract(
+            html,
+            MostaqlScraper._description_from,
+            only=PROJECT_BRIEF,
+        )
 
-                wait = self._backoff(attempt)
+    @staticmethod
+    def _description_from(soup) -> str:
 
-                logger.warning(
-                    "Project fetch failed (%s attempt=%s): %s",
-                    project_url,
-                    attempt,
-                    exc,
-                )
+        brief = soup.find("div", id="project-brief")
+        if not brief:
+            return ""
 
-                time.sleep(wait)
+        body = brief.find("div", class_="carda__body") or brief
+        content = (
+            body.find("div", class_="text-wrapper-div")
+            or body
+        )
 
-        return ""
+        return content.get_text(
+            separator=" ",
+            strip=True,
+        )
 
-    # =====================================================
-    # parsing
-    # =====================================================
+    @staticmethod
+    def _parse_projects(html: str) -> list[dict]:
 
-    def _parse_projects(self, html: str) -> list[dict]:
+        return extract(
+            html,
+            MostaqlScraper._projects_from,
+            only=PROJECT_ROWS,
+        )
 
-        soup = BeautifulSoup(html, "html.parser")
+    @staticmethod
+    def _projects_from(soup) -> list[dict]:
 
         cards = soup.find_all("div", class_="project-card")
 
@@ -247,25 +335,56 @@ class MostaqlScraper(BaseScraper):
                 {
                     "title": title,
                     "project_url": href,
+                    **MostaqlScraper._parse_meta(card),
                 }
             )
 
         return projects
 
+    @staticmethod
+    def _parse_meta(card) -> dict:
+        """
+        Client, bids, budget and posting time from a project card's row;
+        missing pieces stay None so the pre-filter lets them through.
+        """
+
+        row = card.find_parent("tr") or card
+
+        client = row.select_one("ul.project__meta bdi")
+        stamp = row.select_one("ul.project__meta time")
+
+        bids = None
+        for item in row.select("ul.project__meta li"):
+            text = item.get_text(" ", strip=True)
+            if "أضف أول عرض" in text:
+                bids = 0
+            elif "عرض" in text or "عروض" in text:
+                bids = parse_count(text)
+
+        budget = row.select_one(".project__budget")
+        budget_min, budget_max = parse_budget(
+            budget.get_text(" ", strip=True) if budget else ""
+        )
+
+        return {
+            "client": client.get_text(strip=True) if client else "",
+            "bids": bids,
+            "budget_min": budget_min,
+            "budget_max": budget_max,
+            "posted_at": (
+                parse_posted(
+                    stamp.get("datetime"),
+                    stamp.get_text(" ", strip=True),
+                )
+                if stamp
+                else None
+            ),
+        }
+
     # =====================================================
     # helpers
     # =====================================================
 
-    def _matches_keywords(self, text: str) -> bool:
-
-        lowered = text.lower()
-        return any(k.lower() in lowered for k in KEYWORDS)
-
-    def _sleep(self, a: float, b: float):
-
-        time.sleep(random.uniform(a, b))
-
-    @staticmethod
-    def _backoff(attempt: int) -> float:
+    def _matched_keywords(self, text: str) -> list[str]:
 
-        return (2 ** attempt) + random.uniform(0, 2)
+        return self.matcher.find(text)
@@ -0,0 +1,39 @@
+import os
+from typing import Callable, TypeVar
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from services.metrics import METRICS
+
+try:
+    import lxml  # noqa: F401  (BeautifulSoup's "lxml" tree builder)
+except ImportError:
+    lxml = None
+
+
+T = TypeVar("T")
+
+# tree builder shared by every scraper: lxml when installed (several times
+# faster), otherwise the stdlib parser; HTML_PARSER=html.parser forces it
+PARSER = os.getenv("HTML_PARSER") or ("lxml" if lxml is not None else "html.parser")
+
+# build only the strained subtrees (PARTIAL_PARSE=0 always builds the full tree)
+PARTIAL = os.getenv("PARTIAL_PARSE", "1") != "0"
+
+
+def make_soup(html: str, only: SoupStrainer | None = None) -> BeautifulSoup:
+    return BeautifulSoup(html, PARSER, parse_only=only)
+
+
+def extract(html: str, fn: Callable[[BeautifulSoup], T], only: SoupStrainer | None = None) -> T:
+    """
+    Run ``fn`` over a soup holding just the subtrees matched by ``only``.
+    If that finds nothing (the markup moved), ``fn`` runs again over the
+    whole document, so the full selector fallbacks still apply.
+    """
+    if PARTIAL and only is not None:
+        result = fn(make_soup(html, only))
+        if result:
+            return result
+        METRICS.inc("parse_fallback_total", fn=fn.__qualname__)
+    return fn(make_soup(html))
@@ -0,0 +1,54 @@
+import logging
+from importlib import import_module
+from importlib.metadata import entry_points
+
+
+logger = logging.getLogger(__name__)
+
+
+ENTRY_POINT_GROUP = "jobscraper.scrapers"
+
+BUILTIN_SCRAPERS = {
+    "khamsat": "scrapers.khamsat:KhamsatScraper",
+    "mostaql": "scrapers.mostaql:MostaqlScraper",
+}
+
+
+def _load(target: str):
+    module, _, attr = target.partition(":")
+    return getattr(import_module(module), attr)
+
+
+def _parse_plugins(spec: str) -> dict[str, str]:
+    """Parse ``"name=module:Class,other=module:Class"`` from config."""
+    plugins = {}
+    for item in spec.split(","):
+        name, sep, target = item.strip().partition("=")
+        if sep and name and target:
+            plugins[name.strip()] = target.strip()
+    return plugins
+
+
+def available_scrapers(plugins: str = "") -> dict[str, str]:
+    """
+    Every known source name mapped to its ``module:Class`` target: the
+    built-ins, installed ``jobscraper.scrapers`` entry points, then extra
+    sources listed in config (later ones override earlier ones).
+    """
+    targets = dict(BUILTIN_SCRAPERS)
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        targets[ep.name] = ep.value
+    targets.update(_parse_plugins(plugins))
+    return targets
+
+
+def resolve_scrapers(names, plugins: str = "") -> dict[str, type]:
+    """Load the scraper classes for ``names``; unknown names raise ValueError."""
+    targets = available_scrapers(plugins)
+    unknown = [n for n in names if n not in targets]
+    if unknown:
+        raise ValueError(
+            f"unknown source(s) {', '.join(unknown)}; "
+            f"available: {', '.join(sorted(targets))}"
+        )
+    return {name: _load(targets[name]) for name in names}
@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from domain.job import Job
+from scrapers.base import PagedScraper
+from services.metrics import METRICS
+from storage.work_queue import Task, WorkQueue
+
+
+logger = logging.getLogger(__name__)
+
+# finished tasks (and the keys that dedupe them) are kept this long
+KEEP_FINISHED = 7 * 86400
+
+
+def seed_crawl(queue: WorkQueue, scrapers: dict[str, type], cycle: str) -> int:
+    """
+    Enqueue one crawl of every source: its first list-page tasks, or a
+    single whole-source ``crawl`` task for scrapers that are not a
+    :class:`~scrapers.base.PagedScraper`.
+    Seeding the same ``cycle`` twice adds nothing.
+    """
+    queue.prune(KEEP_FINISHED)
+    added = 0
+    for name, cls in scrapers.items():
+        if not issubclass(cls, PagedScraper):
+            added += queue.put("crawl", name, {"cycle": cycle}, key=f"{cycle}:{name}:crawl")
+            continue
+        added += queue.put_many(
+            "list", name,
+            [({"cycle": cycle, "page": t}, _list_key(cycle, name, t)) for t in cls.list_tasks()],
+        )
+    return added
+
+
+def _list_key(cycle, name, task):
+    return f"{cycle}:{name}:list:{json.dumps(task, sort_keys=True, ensure_ascii=False)}"
+
+
+class QueueWorker:
+    """
+    Pulls tasks from a :class:`WorkQueue` and runs them against this
+    process's scrapers. Each stage enqueues the next one, so any number of
+    workers can share a crawl:
+
+        list (one page) -> detail (one job) -> enrich -> send
+
+    List pages also enqueue the following page, so paging stops exactly
+    where a single-process run would.
+    """
+
+    def __init__(self, queue: WorkQueue, scrapers: dict, worker_id: str = "", threads: int = 1, poll: float = 1.0):
+        self.queue = queue
+        self.scrapers = scrapers
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        # tasks mostly wait on the network, so each process runs a few at once
+        self.threads = max(threads, 1)
+        self.poll = poll
+        self._stopping = threading.Event()
+
+    def stop(self, *_):
+        self._stopping.set()
+
+    def run(self) -> int:
+        """Work until the queue has drained (or :meth:`stop`); return tasks done."""
+        with ThreadPoolExecutor(self.threads, thread_name_prefix="task") as pool:
+            loops = [pool.submit(self._loop, f"{self.worker_id}/{i}") for i in range(self.threads)]
+            return sum(f.result() for f in loops)
+
+    def _loop(self, lease_id: str) -> int:
+        done = 0
+        while not self._stopping.is_set():
+            task = self.queue.lease(lease_id)
+            if task is None:
+                # other workers may still be producing follow-up tasks
+                if not self.queue.active():
+                    break
+                self._stopping.wait(self.poll)
+                continue
+            try:
+                with METRICS.timer("task_seconds", kind=task.kind, source=task.source):
+                    self.handle(task)
+            except Exception as e:
+                logger.exception("%s task %s failed (attempt %s)", task.kind, task.id, task.attempts)
+                self.queue.fail(task, repr(e))
+                METRICS.inc("tasks_total", kind=task.kind, outcome="failed")
+            else:
+                self.queue.ack(task)
+                METRICS.inc("tasks_total", kind=task.kind, outcome="done")
+                done += 1
+        return done
+
+    def handle(self, task: Task) -> None:
+        scraper = self.scrapers[task.source]
+        name, payload = task.source, task.payload
+
+        if task.kind == "list":
+            items, next_page = scraper.crawl_page(payload["page"])
+            self.queue.put_many("detail", name, [(item, None) for item in items])
+            if next_page is not None:
+                cycle = payload["cycle"]
+                self.queue.put("list", name, {"cycle": cycle, "page": next_page},
+                               key=_list_key(cycle, name, next_page))
+        elif task.kind == "crawl":
+            for job in scraper.iter_jobs():
+                self._put_job("enrich", name, job)
+        elif task.kind == "detail":
+            self._put_job("enrich", name, scraper.fetch_job(payload))
+        elif task.kind == "enrich":
+            for job in scraper._enriched([Job.from_dict(payload)]):
+                self._put_job("send", name, job)
+        elif task.kind == "send":
+            scraper._notify(Job.from_dict(payload))
+            scraper.telegram.flush()
+        else:
+            raise ValueError(f"unknown task kind {task.kind!r}")
+
+    def _put_job(self, kind, name, job):
+        # one enrich/send per job, even if two list pages surfaced it
+        self.queue.put(kind, name, job.to_dict(), key=f"{name}:{kind}:{job.id}")
@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from services.keyword_matcher import normalize_arabic
+from services.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+SHINGLE = 3
+MIN_SHINGLES = 5
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int | None:
+    """
+    64-bit SimHash over word 3-shingles of the normalised text, or ``None``
+    when the text is too short to fingerprint reliably.
+    """
+    tokens = _TOKEN.findall(normalize_arabic(text))
+    shingles = [" ".join(tokens[i:i + SHINGLE]) for i in range(len(tokens) - SHINGLE + 1)]
+    if len(shingles) < MIN_SHINGLES:
+        return None
+
+    weights = [0] * BITS
+    for shingle in shingles:
+        h = _hash64(shingle)
+        for bit in range(BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+
+
+def _bands(fp: int) -> list[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [fp >> (i * BAND_BITS) & mask for i in range(BANDS)]
+
+
+def _signed(fp: int) -> int:
+    # SQLite integers are signed 64-bit
+    return fp - (1 << BITS) if fp >= 1 << (BITS - 1) else fp
+
+
+class NearDuplicateIndex:
+    """
+    Persistent SimHash index for collapsing near-duplicate jobs across
+    sources and reposts. The fingerprint is split into 4 indexed 16-bit
+    bands: any two fingerprints within 3 bits share at least one band, so a
+    lookup only compares against the rows sharing a band instead of the
+    whole history.
+
+    The database also tracks whether each original's alert has been built
+    yet and which duplicate URLs are waiting to be listed in it, so the
+    merge works across processes sharing the file.
+    """
+
+    def __init__(self, path: str, max_distance: int = 3, window_days: float = 30):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_distance = min(max_distance, BANDS - 1)
+        self.window = window_days * 86400
+
+        self._lock = threading.Lock()
+        # autocommit: check/release open BEGIN IMMEDIATE, serialising them across processes
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        # WAL + a long busy timeout: queue worker processes share this file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                url         TEXT PRIMARY KEY,
+                source      TEXT NOT NULL,
+                fingerprint INTEGER NOT NULL,
+                created_at  REAL NOT NULL,
+                {", ".join(f"band{i} INTEGER NOT NULL" for i in range(BANDS))},
+                alerted     INTEGER NOT NULL DEFAULT 1
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(fingerprints)")}
+        if "alerted" not in columns:
+            # rows from before merge tracking: their alerts are long gone
+            try:
+                self._conn.execute("ALTER TABLE fingerprints ADD COLUMN alerted INTEGER NOT NULL DEFAULT 1")
+            except sqlite3.OperationalError:
+                pass  # another worker process added it first
+        for i in range(BANDS):
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS fingerprints_band{i} ON fingerprints (band{i})"
+            )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alternates (
+                original TEXT NOT NULL,
+                url      TEXT NOT NULL,
+                PRIMARY KEY (original, url)
+            )
+            """
+        )
+
+    def _find(self, fp: int, now: float) -> tuple[str, bool] | None:
+        where = " OR ".join(f"band{i} = ?" for i in range(BANDS))
+        rows = self._conn.execute(
+            f"SELECT url, alerted, fingerprint FROM fingerprints WHERE created_at >= ? AND ({where})",
+            (now - self.window, *_bands(fp)),
+        ).fetchall()
+        best = None
+        for url, alerted, other in rows:
+            distance = bin(fp ^ (other % (1 << BITS))).count("1")
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, url, bool(alerted))
+        return best[1:] if best else None
+
+    def check(self, job, source: str) -> tuple[str, bool] | None:
+        """
+        ``None`` if ``job`` is new. For a near-duplicate, returns
+        ``(original_url, merged)``: ``merged`` is true when
+        the original's alert has not been built yet, so the duplicate's URL
+        was queued for it (see :meth:`release`) and one alert lists both.
+        """
+        fp = simhash(f"{job.title}\n{job.description}")
+        if fp is None:
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                found = self._find(fp, now)
+                if found is None:
+                    self._conn.execute(
+                        f"""
+                        INSERT OR REPLACE INTO fingerprints
+                            (url, source, fingerprint, created_at, {", ".join(f"band{i}" for i in range(BANDS))}, alerted)
+                        VALUES (?, ?, ?, ?, {", ".join("?" * BANDS)}, 0)
+                        """,
+                        (job.url, source, _signed(fp), now, *_bands(fp)),
+                    )
+                else:
+                    original_url, alerted = found
+                    if original_url != job.url and not alerted:
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO alternates VALUES (?, ?)", (original_url, job.url)
+                        )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if found is None or original_url == job.url:
+            return None
+        logger.info("Near-duplicate of %s: %s", original_url, job.url)
+        METRICS.inc("duplicates_total", source=source)
+        return original_url, not alerted
+
+    def release(self, url: str) -> list[str]:
+        """
+        The alert for ``url`` is being built: return the duplicate URLs to
+        list in it (again, if a failed alert is retried). Duplicates found
+        from now on get a follow-up instead.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("UPDATE fingerprints SET alerted = 1 WHERE url = ?", (url,))
+                rows = self._conn.execute(
+                    "SELECT url FROM alternates WHERE original = ? ORDER BY rowid", (url,)
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [u for (u,) in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
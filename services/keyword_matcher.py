@@ -0,0 +1,76 @@
+import re
+from typing import Iterable
+
+
+_DIACRITICS = re.compile(r"[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_SEPARATORS = re.compile(r"[\s\-_]+")
+_LETTERS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي",
+    "ة": "ه",
+    "ؤ": "و",
+})
+
+
+def normalize_arabic(text: str) -> str:
+    """
+    Lower-case and fold Arabic spelling variants: alef forms, alef maqsura,
+    teh marbuta, hamza carriers, diacritics and tatweel. Hyphens and runs
+    of whitespace collapse to one space.
+    """
+    text = _DIACRITICS.sub("", text.lower())
+    text = text.translate(_LETTERS)
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+def is_word_char(ch: str) -> bool:
+    """Characters that need a word boundary next to them (ASCII letters and digits)."""
+    return ch.isascii() and ch.isalnum()
+
+
+class KeywordMatcher:
+    """
+    All keywords of one list compiled into a single regex over normalised
+    text. Latin keywords are anchored on word boundaries (so "ai" does not
+    match "email"); Arabic keywords match as substrings so prefixes such as
+    "ال" or "و" still hit.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: dict[str, str] = {}
+        for kw in keywords:
+            norm = normalize_arabic(kw)
+            if norm:
+                self.keywords.setdefault(norm, kw)
+        self._index = {norm: i for i, norm in enumerate(self.keywords)}
+
+        alternatives = []
+        for norm in sorted(self.keywords, key=len, reverse=True):
+            pattern = re.escape(norm)
+            if is_word_char(norm[0]):
+                pattern = r"(?<![a-z0-9])" + pattern
+            if is_word_char(norm[-1]):
+                pattern += r"(?![a-z0-9])"
+            alternatives.append(pattern)
+
+        body = "|".join(alternatives) or r"(?!)"
+        self._any = re.compile(body)
+        # zero-width lookahead so overlapping keywords are all reported
+        self._all = re.compile(f"(?=({body}))")
+
+    def matches(self, text: str) -> bool:
+        return self._any.search(normalize_arabic(text)) is not None
+
+    def find(self, text: str) -> list[str]:
+        """Keywords (as originally spelled) found in ``text``, first hit first."""
+        hits: dict[str, None] = {}
+        for m in self._all.finditer(normalize_arabic(text)):
+            hits.setdefault(self.keywords[m.group(1)], None)
+        return list(hits)
+
+    def counts(self, text: str) -> list[int]:
+        """Occurrences of each keyword, aligned with ``self.keywords``."""
+        row = [0] * len(self._index)
+        for m in self._all.finditer(normalize_arabic(text)):
+            row[self._index[m.group(1)]] += 1
+        return row
@@ -0,0 +1,169 @@
+import cProfile
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+PREFIX = "jobscraper"
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in key)
+    return "{" + inner + "}"
+
+
+class Metrics:
+    """
+    Process-wide counters and timers labelled by source/stage/host.
+    Timers keep count, sum and max, which is what the run summary and the
+    Prometheus textfile need.
+    """
+
+    def __init__(self):
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._timers: dict[str, dict[tuple, list[float]]] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = _key(labels)
+        with self._lock:
+            stat = self._timers.setdefault(name, {}).setdefault(key, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+            self.started = time.time()
+
+    # =====================================================
+    # export
+    # =====================================================
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                for name, series in self._counters.items()
+            }
+            timers = {
+                name: [
+                    {"labels": dict(k), "count": c, "sum_s": round(s, 4), "max_s": round(m, 4)}
+                    for k, (c, s, m) in series.items()
+                ]
+                for name, series in self._timers.items()
+            }
+        return {
+            "started": self.started,
+            "duration_s": round(time.time() - self.started, 3),
+            "counters": counters,
+            "timers": timers,
+        }
+
+    def prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_fmt_labels(key)} {value}")
+            for name, series in sorted(self._timers.items()):
+                metric = f"{PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} summary")
+                for key, (count, total, _) in sorted(series.items()):
+                    lines.append(f"{metric}_sum{_fmt_labels(key)} {total:.6f}")
+                    lines.append(f"{metric}_count{_fmt_labels(key)} {count}")
+        lines.append(f"# TYPE {PREFIX}_last_run_timestamp_seconds gauge")
+        lines.append(f"{PREFIX}_last_run_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: str = "", textfile_path: str = "") -> None:
+        """Write the JSON summary and/or Prometheus textfile (atomically)."""
+        if json_path:
+            _atomic_write(json_path, json.dumps(self.snapshot(), indent=2, ensure_ascii=False))
+        if textfile_path:
+            _atomic_write(textfile_path, self.prometheus())
+
+
+def _atomic_write(path: str, text: str) -> None:
+    # the textfile collector may read at any time: never expose a partial file
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # a unique temp name, so concurrent writers never replace each other's file
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=target.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        # mkstemp creates 0600; the collector runs as another user
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def profiled(path: str):
+    """
+    Profile the enclosed block with cProfile when ``path`` is set. cProfile
+    only sees the thread that enables it, and the work runs on pool and
+    pipeline threads, so every thread started inside the block gets its
+    own profiler; all of them are merged into one dump at the end.
+    """
+    if not path:
+        yield
+        return
+    profilers = [cProfile.Profile()]
+    lock = threading.Lock()
+
+    def start(frame, event, arg):
+        # first event in a new thread: hand the thread over to its own profiler
+        profiler = cProfile.Profile()
+        with lock:
+            profilers.append(profiler)
+        profiler.enable()
+
+    threading.setprofile(start)
+    profilers[0].enable()
+    try:
+        yield
+    finally:
+        # disable() acts on the calling thread: stop ours before reading the others
+        profilers[0].disable()
+        threading.setprofile(None)
+        with lock:
+            stats = pstats.Stats(*profilers)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(path)
+
+
+METRICS = Metrics()
@@ -0,0 +1,104 @@
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    One step of a streaming pipeline. ``fn`` takes an item and returns the
+    item to pass on, or ``None`` to drop it.
+    """
+
+    name: str
+    fn: Callable
+    workers: int = 1
+
+
+def stream(source: Iterable, stages: list[Stage], maxsize: int = 8) -> int:
+    """
+    Feed ``source`` through ``stages``, each running on its own thread(s)
+    and connected by bounded queues, so a slow stage applies backpressure
+    instead of buffering the whole run. Items reach the last stage as soon
+    as they are produced. Returns how many items left the last stage.
+
+    If ``source`` raises, what it produced so far is still drained through
+    the stages, then the exception is re-raised so the caller sees the
+    failure.
+    """
+    inboxes = [queue.Queue(maxsize=maxsize) for _ in stages]
+    delivered = 0
+    lock = threading.Lock()
+    failed = []
+
+    def produce():
+        try:
+            for item in source:
+                inboxes[0].put(item)
+        except Exception as e:
+            failed.append(e)
+        finally:
+            inboxes[0].put(_DONE)
+
+    def work(index: int, stage: Stage, remaining: list[int]):
+        nonlocal delivered
+        inbox = inboxes[index]
+        outbox = inboxes[index + 1] if index + 1 < len(stages) else None
+
+        while True:
+            item = inbox.get()
+
+            if item is _DONE:
+                # let sibling workers see the sentinel too; the last one out
+                # closes the next stage
+                inbox.put(_DONE)
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and outbox is not None:
+                    outbox.put(_DONE)
+                return
+
+            try:
+                out = stage.fn(item)
+            except Exception:
+                logger.exception("pipeline stage %s failed", stage.name)
+                continue
+
+            if out is None:
+                continue
+            if outbox is not None:
+                outbox.put(out)
+            else:
+                with lock:
+                    delivered += 1
+
+    threads = [threading.Thread(target=produce, name="pipeline-source", daemon=True)]
+    for index, stage in enumerate(stages):
+        remaining = [max(stage.workers, 1)]
+        for n in range(remaining[0]):
+            threads.append(
+                threading.Thread(
+                    target=work,
+                    args=(index, stage, remaining),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True,
+                )
+            )
+
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if failed:
+        logger.warning("pipeline source failed after %s items", delivered)
+        raise failed[0]
+    return delivered
@@ -0,0 +1,184 @@
+import re
+from dataclasses import dataclass
+
+from services.metrics import METRICS
+
+
+# Static instructions, sent as the system message. They are byte-identical on
+# every call, so providers with prompt caching can reuse them as a prefix;
+# only the job itself goes into the (short) user message.
+INSTRUCTIONS = """
+You are an expert Arabic-speaking freelancer and project planner.
+
+You will receive a job post (title + description) in Arabic from a freelancing website.
+
+YOUR TASKS:
+1) Read and deeply understand the Arabic job title and description.
+2) Produce a short Arabic summary of the job (2–4 جمل) يوضح المطلوب من العميل بشكل بسيط وواضح.
+3) Design a clear, step-by-step work plan IN ARABIC that explains exactly how I will execute this project from start to finish.
+4) Write a professional PROPOSAL that is a mix of Arabic and English:
+   - The main body and explanations should be in Arabic.
+   - Use English for technical terms, tools, and short phrases when it makes sense (e.g. Python, web scraping, OCR, AI, prompts, APIs).
+   - The proposal should sound natural for an Arabic-speaking client who is comfortable with some English tech terms.
+
+WHAT TO INCLUDE:
+
+A) "summary" (ARABIC):
+   - 2–4 جمل تلخّص هدف المشروع، نوع المهمة، وأهم المتطلبات بشكل واضح ومباشر.
+
+B) "plan" (ARABIC ONLY):
+   - Detailed, numbered steps explaining how I will do the task.
+   - Mention tools, libraries, and technologies (Python, web scraping, OCR, AI models, etc.) but keep the explanation itself in Arabic.
+   - Explain the workflow so the project to help the task developer.
+   - Use lists to show your answer.
+   - Make your answer confine and precise.
+
+C) "proposal" (MIX ARABIC(Make most of the response in Arabic) + ENGLISH(use it only for technical abbreviations)):
+   - Start with a tailored opening in Arabic يثبت أنك فهمت احتياج العميل.
+   - Mention my experience في الذكاء الاصطناعي، OCR، Python، Web Scraping، وتحليل البيانات فقط عندما يكون ذلك مناسبًا لهذا المشروع.
+   - Briefly outline the steps (يمكن خلط العربي مع English في الأجزاء التقنية).
+   - Mention estimated timeline and deliverables clearly.
+   - Use a confident, polite tone.
+   - Avoid unrealistic promises.
+   - Do NOT mention that you are an AI or language model.
+   - Do NOT use placeholders مثل [اسم العميل] أو [ضع هنا كذا].
+   - Make you answer confine and precise.
+
+OUTPUT FORMAT (VERY IMPORTANT):
+Return ONLY valid JSON. No comments, no markdown, no explanations.
+
+Exact format:
+
+{
+  "summary": "ملخص عربي قصير لوصف الوظيفة هنا...",
+  "plan": "نص خطة العمل التفصيلية بالعربية هنا...",
+  "proposal": "نص العرض (البروبوزال) المزيج عربي + إنجليزي هنا..."
+}
+""".strip()
+
+USER_TEMPLATE = """
+JOB TITLE (Arabic):
+{title}
+
+JOB DESCRIPTION (Arabic):
+{description}
+""".strip()
+
+# descriptions are never cut below this, whatever the budget says
+MIN_DESCRIPTION_TOKENS = 150
+
+_URL = re.compile(r"(?:https?://|www\.)\S+")
+_SPACES = re.compile(r"[ \t\u00a0\u2009\u200b-\u200f\u202f]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_RUNS = re.compile(r"([^\w\s])\1{2,}")
+_SENTENCE = re.compile(r"(?<=[.!?؟\n])\s+")
+# site chrome that leaks into descriptions when the main selector misses
+_CHROME = (
+    r"شارك(?:\s+المشروع)?|أضف عرضك|قدم عرضك|تسجيل الدخول|إنشاء حساب|"
+    r"بلغ عن محتوى|الإبلاغ عن المشروع|جميع الحقوق محفوظة|share|report|log ?in|sign ?up"
+)
+# a line (or sentence) made of nothing but chrome; real text that merely
+# starts with "شارك" or "Report" is kept
+_CHROME_LINE = re.compile(rf"^[\s·|:.\-]*(?:(?:{_CHROME})[\s·|:.\-]*)+$", re.IGNORECASE | re.MULTILINE)
+# unambiguous button labels glued to the end of a one-line description
+_CHROME_TAIL = re.compile(
+    r"(?:[\s·|]*(?:شارك المشروع|أضف عرضك|قدم عرضك|بلغ عن محتوى|الإبلاغ عن المشروع|جميع الحقوق محفوظة))+[\s·|]*$"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~3 characters per token is a safe side estimate for mixed Arabic/English
+    return len(text) // 3 + 1
+
+
+def compact(text: str) -> str:
+    """
+    Strip boilerplate lines and links, squeeze whitespace and repeated
+    punctuation/emoji, and drop sentences repeated verbatim. Ordinary
+    text passes through unchanged, even when it opens with a chrome word:
+
+    >>> compact("شارك معنا في بناء تطبيق جوال للتوصيل.")
+    'شارك معنا في بناء تطبيق جوال للتوصيل.'
+    >>> compact("Report generation tool in Python that emails PDFs.")
+    'Report generation tool in Python that emails PDFs.'
+    >>> compact("نحتاج مترجم محترف لترجمة 20 صفحة. شارك المشروع")
+    'نحتاج مترجم محترف لترجمة 20 صفحة.'
+    >>> compact("مطلوب بوت تليجرام\\nشارك\\nأضف عرضك")
+    'مطلوب بوت تليجرام'
+    """
+    text = _CHROME_LINE.sub("", text)
+    text = _CHROME_TAIL.sub("", text)
+    text = _URL.sub("[link]", text)
+    text = _RUNS.sub(r"\1", text)
+    text = _SPACES.sub(" ", text)
+    text = _BLANK_LINES.sub("\n", text)
+    seen = set()
+    sentences = []
+    for sentence in _SENTENCE.split(text):
+        key = sentence.strip().casefold()
+        if not key or key in seen or _CHROME_LINE.match(key):
+            continue
+        seen.add(key)
+        sentences.append(sentence.strip())
+    return " ".join(sentences)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """
+    Fit ``text`` into ``max_tokens`` keeping the opening (what is wanted)
+    and the closing (deliverables, deadline), cut at sentence boundaries.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens * 3
+    head, tail = text[: budget * 3 // 4], text[-(budget // 4):]
+    # back off to the last/first sentence break inside each window
+    cut = max(head.rfind(ch) for ch in ".!?؟\n")
+    if cut > len(head) // 2:
+        head = head[: cut + 1]
+    cut = min((i for i in (tail.find(ch) for ch in ".!?؟\n") if i >= 0), default=-1)
+    if 0 <= cut < len(tail) // 2:
+        tail = tail[cut + 1:]
+    return f"{head.strip()} … {tail.strip()}"
+
+
+@dataclass(frozen=True)
+class Prompt:
+    system: str
+    user: str
+    # estimated input tokens (system + user)
+    tokens: int
+
+
+class PromptBuilder:
+    """
+    Builds proposal prompts within a per-model input-token budget: the
+    description is compacted, then truncated to whatever the budget leaves
+    after the fixed instructions and template.
+    """
+
+    def __init__(self, budget: int = 3000, budgets: dict[str, int] | None = None):
+        self.budget = budget
+        self.budgets = budgets or {}
+        self._fixed = estimate_tokens(INSTRUCTIONS) + estimate_tokens(USER_TEMPLATE)
+
+    @classmethod
+    def from_config(cls, cfg) -> "PromptBuilder":
+        budgets = {}
+        for item in cfg.llm_prompt_budgets.split(","):
+            model, _, tokens = item.strip().rpartition("=")
+            if model and tokens.strip().isdigit():
+                budgets[model.strip()] = int(tokens)
+        return cls(cfg.llm_prompt_budget, budgets)
+
+    def budget_for(self, model: str) -> int:
+        return self.budgets.get(model, self.budget)
+
+    def build(self, title: str, description: str, model: str = "") -> Prompt:
+        description = compact(description or "")
+        room = max(self.budget_for(model) - self._fixed - estimate_tokens(title), MIN_DESCRIPTION_TOKENS)
+        if estimate_tokens(description) > room:
+            description = truncate(description, room)
+            METRICS.inc("llm_prompts_truncated_total", model=model)
+        user = USER_TEMPLATE.format(title=title, description=description or "لا يوجد وصف")
+        return Prompt(INSTRUCTIONS, user, estimate_tokens(INSTRUCTIONS) + estimate_tokens(user))
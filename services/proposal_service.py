@@ -1,70 +1,105 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from net.politeness import TokenBucket
+from services.prompt_builder import PromptBuilder
+
+logger = logging.getLogger(__name__)
+
+# rough completion size used when budgeting tokens per minute
+EXPECTED_COMPLETION_TOKENS = 800
+
+PROPOSAL_FIELDS = ("summary", "plan", "proposal")
+
+_DONE = object()
+
+
+def _text(value):
+    """An LLM field as text: lists (plans often come back as one) become one item per line."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "\n".join(_text(item) for item in value)
+    if isinstance(value, dict):
+        return "\n".join(f"{key}: {_text(item)}" for key, item in value.items())
+    return str(value)
+
+
 class ProposalService:
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, enabled=True, max_in_flight=4, tokens_per_minute=0, prompts=None):
         self.llm = llm_client
+        self.enabled = enabled
+        self.max_in_flight = max(max_in_flight, 1)
+        self.tokens_per_minute = tokens_per_minute
+        self.prompts = prompts or PromptBuilder()
+        # one budget per service, shared by every source, cycle and batch
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._budget = None
+        if tokens_per_minute > 0:
+            self._budget = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
 
     def generate(self, job):
-        prompt = self._build_prompt(job.title, job.description)
-        data = self.llm.generate_json(prompt)
-        job.plan = data.get("plan", "")
-        job.proposal = data.get("proposal", "")
-        job.summary = data.get("summary", "")
+        prompt = self._build_prompt(job)
+        data = self.llm.generate_json(
+            prompt.user, system=prompt.system, estimated_tokens=prompt.tokens, fields=PROPOSAL_FIELDS
+        )
+        job.plan = _text(data.get("plan"))
+        job.proposal = _text(data.get("proposal"))
+        job.summary = _text(data.get("summary"))
         return job
 
-    def _build_prompt(self, title, description):
-        if not description:
-            description = "لا يوجد وصف"
-        return f"""
-You are an expert Arabic-speaking freelancer and project planner.
-
-You will receive a job post (title + description) in Arabic from a freelancing website.
-
-JOB TITLE (Arabic):
-{title}
-
-JOB DESCRIPTION (Arabic):
-{description}
-
-YOUR TASKS:
-1) Read and deeply understand the Arabic job title and description.
-2) Produce a short Arabic summary of the job (2–4 جمل) يوضح المطلوب من العميل بشكل بسيط وواضح.
-3) Design a clear, step-by-step work plan IN ARABIC that explains exactly how I will execute this project from start to finish.
-4) Write a professional PROPOSAL that is a mix of Arabic and English:
-   - The main body and explanations should be in Arabic.
-   - Use English for technical terms, tools, and short phrases when it makes sense (e.g. Python, web scraping, OCR, AI, prompts, APIs).
-   - The proposal should sound natural for an Arabic-speaking client who is comfortable with some English tech terms.
-
-WHAT TO INCLUDE:
-
-A) "summary" (ARABIC):
-   - 2–4 جمل تلخّص هدف المشروع، نوع المهمة، وأهم المتطلبات بشكل واضح ومباشر.
-
-B) "plan" (ARABIC ONLY):
-   - Detailed, numbered steps explaining how I will do the task.
-   - Mention tools, libraries, and technologies (Python, web scraping, OCR, AI models, etc.) but keep the explanation itself in Arabic.
-   - Explain the workflow so the project to help the task developer.
-   - Use lists to show your answer.
-   - Make your answer confine and precise.
-
-C) "proposal" (MIX ARABIC(Make most of the response in Arabic) + ENGLISH(use it only for technical abbreviations)):
-   - Start with a tailored opening in Arabic يثبت أنك فهمت احتياج العميل.
-   - Mention my experience في الذكاء الاصطناعي، OCR، Python، Web Scraping، وتحليل البيانات فقط عندما يكون ذلك مناسبًا لهذا المشروع.
-   - Briefly outline the steps (يمكن خلط العربي مع English في الأجزاء التقنية).
-   - Mention estimated timeline and deliverables clearly.
-   - Use a confident, polite tone.
-   - Avoid unrealistic promises.
-   - Do NOT mention that you are an AI or language model.
-   - Do NOT use placeholders مثل [اسم العميل] أو [ضع هنا كذا].
-   - Make you answer confine and precise.
-
-OUTPUT FORMAT (VERY IMPORTANT):
-Return ONLY valid JSON. No comments, no markdown, no explanations.
-
-Exact format:
-
-{{
-  "summary": "ملخص عربي قصير لوصف الوظيفة هنا...",
-  "plan": "نص خطة العمل التفصيلية بالعربية هنا...",
-  "proposal": "نص العرض (البروبوزال) المزيج عربي + إنجليزي هنا..."
-}}
-""".strip()
+    def generate_many(self, jobs):
+        """
+        Enrich ``jobs`` (any iterable, consumed lazily) with up to
+        ``max_in_flight`` concurrent LLM calls, paced by a tokens-per-minute
+        budget when one is set. Both limits belong to the service, so they
+        hold across concurrent calls. Jobs are yielded as their call
+        completes, in completion order; a failed call yields the job
+        un-enriched.
+        """
+        results = queue.Queue()
+        slots, budget = self._slots, self._budget
+
+        def run(job):
+            try:
+                self.generate(job)
+            except Exception as e:
+                logger.warning("Enrichment failed for %s: %s", job.url, e)
+            finally:
+                slots.release()
+                results.put(job)
+
+        def feed():
+            try:
+                with ThreadPoolExecutor(self.max_in_flight, thread_name_prefix="llm") as pool:
+                    for job in jobs:
+                        slots.acquire()
+                        try:
+                            if budget is not None:
+                                prompt = self._build_prompt(job)
+                                # a cached answer costs no tokens
+                                if not self.llm.is_cached(prompt.user, prompt.system):
+                                    budget.acquire(prompt.tokens + EXPECTED_COMPLETION_TOKENS)
+                            pool.submit(run, job)
+                        except BaseException:
+                            slots.release()
+                            raise
+            except Exception:
+                logger.exception("Enrichment input failed")
+            finally:
+                results.put(_DONE)
+
+        threading.Thread(target=feed, name="llm-feed", daemon=True).start()
+
+        while True:
+            job = results.get()
+            if job is _DONE:
+                return
+            yield job
 
+    def _build_prompt(self, job):
+        return self.prompts.build(job.title, job.description, model=self.llm.model)
@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+from services.keyword_matcher import KeywordMatcher, normalize_arabic
+
+_DONE = object()
+
+
+class RelevanceScorer:
+    """
+    Weighted-keyword relevance over titles and descriptions. A batch of
+    jobs becomes two keyword-count matrices (titles, descriptions); the
+    score is one vectorised pass over them:
+
+        raw   = (title_weight * log1p(T) + log1p(D)) @ w
+        score = 1 - exp(-raw)          # 0..1, comparable across batches
+    """
+
+    def __init__(self, matcher: KeywordMatcher, weights: dict[str, float] | None = None, title_weight: float = 2.0):
+        self.matcher = matcher
+        self.title_weight = title_weight
+        overrides = {normalize_arabic(k): v for k, v in (weights or {}).items()}
+        self.weights = np.array(
+            [overrides.get(norm, 1.0) for norm in matcher.keywords],
+            dtype=np.float64,
+        )
+
+    def with_matcher(self, matcher: KeywordMatcher) -> "RelevanceScorer":
+        """Same weights over another keyword list (new keywords weigh 1.0)."""
+        weights = dict(zip(self.matcher.keywords, self.weights))
+        return RelevanceScorer(matcher, weights, self.title_weight)
+
+    def score_texts(self, titles: list[str], descriptions: list[str] | None = None) -> np.ndarray:
+        if not titles:
+            return np.zeros(0)
+        t = np.log1p(np.array([self.matcher.counts(x) for x in titles], dtype=np.float64))
+        raw = self.title_weight * t
+        if descriptions is not None:
+            raw += np.log1p(np.array([self.matcher.counts(x) for x in descriptions], dtype=np.float64))
+        return 1.0 - np.exp(-(raw @ self.weights))
+
+    def score(self, jobs: list) -> np.ndarray:
+        """Score ``jobs`` in one pass and store each job's ``score``."""
+        scores = self.score_texts([j.title for j in jobs], [j.description for j in jobs])
+        for job, s in zip(jobs, scores):
+            job.score = round(float(s), 3)
+        return scores
+
+    def rank(self, jobs: list, top_k: int = 0, threshold: float = 0.0) -> list:
+        """Jobs scoring at least ``threshold``, best first, at most ``top_k``."""
+        if not jobs:
+            return []
+        scores = self.score(jobs)
+        order = np.argsort(-scores, kind="stable")
+        keep = [jobs[i] for i in order if scores[i] >= threshold]
+        return keep[:top_k] if top_k > 0 else keep
+
+    def select(self, jobs, top_k: int = 0, threshold: float = 0.0, max_batch: int = 50, window: float = 0.0):
+        """
+        Streaming form of :meth:`rank`. Jobs are read on a helper thread
+        through a queue of ``max_batch`` slots, so reading never runs
+        further ahead of the consumer than that.
+
+        Without ``top_k`` every batch is whatever has arrived since the last
+        one, so bursts are ranked together without waiting for more jobs.
+        With ``top_k`` the jobs are collected for ``window`` seconds from
+        the first one (0 = the whole run) and the best ``top_k`` of each
+        window are kept, so the cut means what it means for :meth:`rank`.
+        """
+        inbox = queue.Queue(maxsize=max(max_batch, 1))
+
+        def feed():
+            try:
+                for job in jobs:
+                    inbox.put(job)
+            finally:
+                inbox.put(_DONE)
+
+        threading.Thread(target=feed, name="score-feed", daemon=True).start()
+
+        done = False
+        while not done:
+            if top_k > 0:
+                batch, done = self._window(inbox, window)
+            else:
+                batch = [inbox.get()]
+                while len(batch) < max_batch:
+                    try:
+                        batch.append(inbox.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    done = True
+            yield from self.rank(batch, top_k, threshold)
+
+    @staticmethod
+    def _window(inbox, window):
+        """Jobs arriving within ``window`` seconds of the first (0 = until the end)."""
+        batch, deadline = [], None
+        while True:
+            timeout = None
+            if deadline is not None and window > 0:
+                timeout = max(deadline - time.monotonic(), 0)
+            try:
+                job = inbox.get(timeout=timeout)
+            except queue.Empty:
+                return batch, False
+            if job is _DONE:
+                return batch, True
+            batch.append(job)
+            if deadline is None:
+                deadline = time.monotonic() + window
@@ -0,0 +1,120 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from scrapers.listing import ListingFilter
+from services.keyword_matcher import KeywordMatcher, is_word_char, normalize_arabic
+
+
+@dataclass(frozen=True)
+class Subscriber:
+    """
+    One Telegram recipient: its keywords (empty = the source's built-in list),
+    the sources it follows (empty = all) and its own listing filters.
+    """
+
+    name: str
+    chat_id: str
+    keywords: tuple[str, ...] = ()
+    sources: tuple[str, ...] = ()
+    filter: ListingFilter | None = None
+    min_score: float = 0.0
+
+    def follows(self, source: str) -> bool:
+        return not self.sources or source in self.sources
+
+    def accepts(self, job) -> bool:
+        if job.score < self.min_score:
+            return False
+        if self.filter is None:
+            return True
+        return self.filter.accepts(
+            {"bids": job.bids, "budget_max": job.budget_max, "posted_at": job.posted_at}
+        )
+
+
+def load_subscribers(path: str) -> list[Subscriber]:
+    """
+    Read subscriber profiles from a JSON list such as::
+
+        [{"name": "sara", "chat_id": "123", "keywords": ["ocr", "بايثون"],
+          "sources": ["mostaql"], "min_budget": 50, "max_bids": 10}]
+
+    Only ``chat_id`` is required.
+    """
+    profiles = json.loads(Path(path).read_text(encoding="utf-8"))
+    subscribers = []
+    for i, p in enumerate(profiles):
+        if not p.get("chat_id"):
+            raise ValueError(f"{path}: subscriber #{i} has no chat_id")
+        f = ListingFilter(
+            int(p.get("max_bids", -1)),
+            float(p.get("min_budget", 0)),
+            float(p.get("max_age_hours", 0)),
+        )
+        subscribers.append(
+            Subscriber(
+                name=str(p.get("name") or p["chat_id"]),
+                chat_id=str(p["chat_id"]),
+                keywords=tuple(p.get("keywords", ())),
+                sources=tuple(p.get("sources", ())),
+                filter=f if f.active else None,
+                min_score=float(p.get("min_score", 0)),
+            )
+        )
+    return subscribers
+
+
+class SubscriberIndex:
+    """
+    The subscribers following one source, behind an inverted index from
+    normalised keyword to subscribers. ``matcher`` covers the union of
+    their keywords, so the source is crawled (and matched) once however
+    many subscribers there are; :meth:`route` then costs a few dict
+    lookups per keyword the job actually hit.
+    """
+
+    def __init__(self, subscribers: Iterable[Subscriber], source: str, default_keywords: Iterable[str] = ()):
+        defaults = tuple(default_keywords)
+        self.subscribers = [s for s in subscribers if s.follows(source)]
+        self._by_keyword: dict[str, list[Subscriber]] = {}
+        union = []
+        for sub in self.subscribers:
+            for kw in sub.keywords or defaults:
+                norm = normalize_arabic(kw)
+                if not norm:
+                    continue
+                owners = self._by_keyword.setdefault(norm, [])
+                if not owners:
+                    union.append(kw)
+                if sub not in owners[-1:]:
+                    owners.append(sub)
+        self.matcher = KeywordMatcher(union)
+        # the matcher reports only the longest keyword at each position, so
+        # "تفريغ فيديو" must also reach whoever subscribed to "تفريغ"
+        self._hits = {norm: self._prefixes(norm) for norm in self._by_keyword}
+
+    def _prefixes(self, norm: str) -> list[str]:
+        """Indexed keywords that also match at the start of ``norm`` (itself included)."""
+        found = []
+        for end in range(1, len(norm) + 1):
+            prefix = norm[:end]
+            if prefix not in self._by_keyword:
+                continue
+            # same word-boundary rule as the matcher: "vo" is not in "voice"
+            if end < len(norm) and is_word_char(prefix[-1]) and is_word_char(norm[end]):
+                continue
+            found.append(prefix)
+        return found
+
+    def route(self, job) -> list[Subscriber]:
+        """Subscribers whose keywords hit ``job`` and whose filters accept it."""
+        keywords = job.matched_keywords or self.matcher.find(job.title)
+        targets: dict[str, Subscriber] = {}
+        for kw in keywords:
+            norm = normalize_arabic(kw)
+            for hit in self._hits.get(norm, (norm,)):
+                for sub in self._by_keyword.get(hit, ()):
+                    targets.setdefault(sub.chat_id, sub)
+        return [sub for sub in targets.values() if sub.accepts(job)]
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from services.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceState:
+    """Persistent polling cursor and learned post rate for one source."""
+
+    last_poll: float = 0.0
+    interval: float = 0.0
+    # EWMA of new posts per minute, overall and per hour of day
+    rate: float = 0.0
+    hourly: list[float] = field(default_factory=lambda: [0.0] * 24)
+
+
+class AdaptiveSchedule:
+    """
+    Picks the next poll interval so that roughly ``target_new`` new posts
+    are expected per poll: short intervals in busy hours, long ones at night.
+    The rate model blends a global EWMA with a per-hour-of-day EWMA.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, target_new: float = 1.0, alpha: float = 0.3):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new = target_new
+        self.alpha = alpha
+
+    def update(self, state: SourceState, new_items: int, now: float) -> float:
+        if state.last_poll:
+            minutes = max((now - state.last_poll) / 60, 1e-3)
+            observed = new_items / minutes
+            hour = time.localtime(now).tm_hour
+            state.rate += self.alpha * (observed - state.rate)
+            state.hourly[hour] += self.alpha * (observed - state.hourly[hour])
+
+        next_hour = time.localtime(now + self.min_interval).tm_hour
+        expected = 0.5 * state.rate + 0.5 * state.hourly[next_hour]
+        if expected > 0:
+            interval = self.target_new / expected * 60
+        else:
+            interval = self.max_interval
+
+        state.last_poll = now
+        state.interval = min(max(interval, self.min_interval), self.max_interval)
+        return state.interval
+
+
+class Watcher:
+    """
+    Daemon loop: every source polls on its own thread, reusing the same
+    scraper (and so the same warm sessions and caches) every cycle. After
+    a first full incremental crawl only page 1 is polled. The per-source
+    state is saved to ``state_path`` after each poll so restarts resume the
+    learned schedule.
+    """
+
+    def __init__(
+        self,
+        scrapers: dict,
+        state_path: str,
+        schedule: AdaptiveSchedule,
+        cycle_timeout: float,
+        on_cycle=None,
+    ):
+        self.scrapers = scrapers
+        self.state_path = Path(state_path)
+        self.schedule = schedule
+        self.cycle_timeout = cycle_timeout
+        self.on_cycle = on_cycle
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        # on_cycle (checkpoint) is not thread-safe; sources finish polls concurrently
+        self._cycle_lock = threading.Lock()
+        self.states = self._load()
+
+    def _load(self) -> dict[str, SourceState]:
+        try:
+            raw = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        return {name: SourceState(**raw.get(name, {})) for name in self.scrapers}
+
+    def _save(self) -> None:
+        with self._lock:
+            data = {name: asdict(state) for name, state in self.states.items()}
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+            tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+
+    def stop(self, *_args) -> None:
+        logger.info("Shutdown requested, finishing current polls")
+        self.stop_event.set()
+        for scraper in self.scrapers.values():
+            # make in-flight polls stop paging at the next page boundary
+            scraper.deadline = 0
+
+    def run(self) -> None:
+        threads = [
+            threading.Thread(target=self._loop, args=(name,), name=f"watch-{name}")
+            for name in self.scrapers
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def _loop(self, name: str) -> None:
+        scraper = self.scrapers[name]
+        state = self.states[name]
+
+        # resume the persisted schedule instead of polling right away
+        due = state.last_poll + state.interval
+        first = True
+        if self.stop_event.wait(max(due - time.time(), 0)):
+            return
+
+        while not self.stop_event.is_set():
+            scraper.max_pages = None if first else 1
+            scraper.new_items = 0
+            scraper.deadline = time.monotonic() + self.cycle_timeout
+            try:
+                with METRICS.timer("poll_seconds", source=name):
+                    sent = scraper.run()
+                    # settle this poll's deliveries before the next one re-lists pending jobs
+                    scraper.telegram.flush()
+                logger.info("%s: %s new posts, %s jobs queued", name, scraper.new_items, sent)
+            except Exception:
+                METRICS.inc("source_failures_total", source=name)
+                logger.exception("%s poll failed", name)
+
+            try:
+                interval = self.schedule.update(state, scraper.new_items, time.time())
+                self._save()
+                if self.on_cycle is not None:
+                    with self._cycle_lock:
+                        self.on_cycle()
+            except Exception:
+                # a failed checkpoint must not end this source's polling
+                logger.exception("%s: post-poll bookkeeping failed", name)
+                interval = state.interval or self.schedule.min_interval
+            logger.info("%s: next poll in %.0fs", name, interval)
+
+            first = False
+            self.stop_event.wait(interval)
@@ -0,0 +1,206 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from domain.job import Job
+
+try:
+    import pyarrow  # noqa: F401  (pandas' Parquet engine)
+except ImportError:
+    pyarrow = None
+
+
+logger = logging.getLogger(__name__)
+
+# small, typed columns used by analytics; kept apart from the raw text
+META_COLUMNS = [
+    "scraped_at", "source", "id", "url", "posted_at", "client",
+    "bids", "budget_min", "budget_max", "matched_keywords",
+]
+TEXT_COLUMNS = ["title", "description"]
+
+
+class JobArchive:
+    """
+    Append-only, date-partitioned archive of every scraped job.
+
+    Jobs are buffered and written in batches as immutable part files under
+    ``<root>/date=YYYY-MM-DD/``. Each batch is split into a ``meta`` part
+    (ids, timestamps, budget, keywords) and a ``text`` part (title,
+    description), so history queries that only need metadata never read
+    the raw text. Parts are Parquet when pyarrow is installed, otherwise
+    gzip-compressed JSON lines.
+    """
+
+    def __init__(self, root: str, batch_size: int = 500, fmt: str | None = None):
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.fmt = fmt or ("parquet" if pyarrow is not None else "jsonl.gz")
+        self._rows: list[dict] = []
+        self._lock = threading.Lock()
+        self.written = 0
+
+    # ---------- writing ----------
+
+    def append(self, job: Job) -> None:
+        # snapshot now: later stages mutate the job (score, proposal)
+        row = {
+            "scraped_at": datetime.now(timezone.utc),
+            "source": job.source,
+            "id": job.id,
+            "url": job.url,
+            "posted_at": job.posted_at,
+            "client": job.client,
+            "bids": job.bids,
+            "budget_min": job.budget_min,
+            "budget_max": job.budget_max,
+            "matched_keywords": list(job.matched_keywords),
+            "title": job.title,
+            "description": job.description,
+        }
+        with self._lock:
+            self._rows.append(row)
+            if len(self._rows) < self.batch_size:
+                return
+            rows, self._rows = self._rows, []
+        self._write(rows)
+
+    def tap(self, jobs: Iterable[Job]) -> Iterable[Job]:
+        """Pass ``jobs`` through unchanged, archiving each one on the way."""
+        for job in jobs:
+            self.append(job)
+            yield job
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if rows:
+            self._write(rows)
+
+    def close(self) -> None:
+        self.flush()
+        if self.written:
+            logger.info("Archived %s jobs to %s", self.written, self.root)
+
+    def _write(self, rows: list[dict]) -> None:
+        frame = pd.DataFrame(rows)
+        frame["scraped_at"] = pd.to_datetime(frame["scraped_at"], utc=True)
+        frame["posted_at"] = pd.to_datetime(frame["posted_at"], utc=True)
+        frame["bids"] = frame["bids"].astype("Int64")
+        frame["budget_min"] = frame["budget_min"].astype("float64")
+        frame["budget_max"] = frame["budget_max"].astype("float64")
+
+        for day, part in frame.groupby(frame["scraped_at"].dt.date):
+            folder = self.root / f"date={day.isoformat()}"
+            folder.mkdir(parents=True, exist_ok=True)
+            stem = f"part-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+            part = part.reset_index(drop=True)
+            # text first: a meta part without its text twin is never left behind
+            self._write_part(part[TEXT_COLUMNS], folder / f"{stem}.text.{self.fmt}")
+            self._write_part(part[META_COLUMNS], folder / f"{stem}.meta.{self.fmt}")
+        self.written += len(rows)
+
+    def _write_part(self, frame: pd.DataFrame, path: Path) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        if self.fmt == "parquet":
+            frame.to_parquet(tmp, index=False, compression="zstd")
+        else:
+            frame.to_json(tmp, orient="records", lines=True, date_format="iso", compression="gzip")
+        tmp.replace(path)
+
+    # ---------- reading ----------
+
+    def read(
+        self,
+        columns: list[str] | None = None,
+        since: date | None = None,
+        until: date | None = None,
+    ) -> pd.DataFrame:
+        """
+        Archived jobs scraped between ``since`` and ``until`` (inclusive).
+        Only the part files holding ``columns`` are opened, and partitions
+        outside the date range are skipped without being read.
+        """
+        columns = columns or META_COLUMNS + TEXT_COLUMNS
+        kinds = [
+            kind for kind, names in (("meta", META_COLUMNS), ("text", TEXT_COLUMNS))
+            if any(c in names for c in columns)
+        ]
+        frames = []
+        for folder in self._partitions(since, until):
+            # either format may be present if pyarrow came or went between runs
+            for meta in sorted(folder.glob("part-*.meta.*")):
+                if meta.name.endswith(".tmp"):
+                    continue
+                stem, ext = meta.name.split(".meta.", 1)
+                parts = [
+                    self._read_part(folder / f"{stem}.{kind}.{ext}", [c for c in columns if c in names])
+                    for kind, names in (("meta", META_COLUMNS), ("text", TEXT_COLUMNS))
+                    if kind in kinds
+                ]
+                frames.append(pd.concat(parts, axis=1) if len(parts) > 1 else parts[0])
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)[columns]
+
+    def _partitions(self, since: date | None, until: date | None) -> list[Path]:
+        folders = []
+        for folder in sorted(self.root.glob("date=*")):
+            try:
+                day = date.fromisoformat(folder.name[len("date="):])
+            except ValueError:
+                continue
+            if (since is None or day >= since) and (until is None or day <= until):
+                folders.append(folder)
+        return folders
+
+    def _read_part(self, path: Path, columns: list[str]) -> pd.DataFrame:
+        if path.name.endswith(".parquet"):
+            return pd.read_parquet(path, columns=columns)
+        frame = pd.read_json(path, orient="records", lines=True, compression="gzip", convert_dates=False)
+        for col in ("scraped_at", "posted_at"):
+            if col in frame:
+                frame[col] = pd.to_datetime(frame[col], utc=True)
+        if "bids" in frame:
+            frame["bids"] = frame["bids"].astype("Int64")
+        return frame[columns]
+
+    # ---------- analytics ----------
+
+    def keyword_counts(self, since: date | None = None, until: date | None = None, freq: str = "D") -> pd.DataFrame:
+        """
+        Posts per matched keyword per period (rows: period, columns:
+        keyword), bucketed by posting time, or scrape time when unknown.
+        A post seen on several runs is counted once.
+        """
+        frame = self.read(["source", "id", "scraped_at", "posted_at", "matched_keywords"], since, until)
+        if frame.empty:
+            return pd.DataFrame()
+        frame = frame.sort_values("scraped_at").drop_duplicates(["source", "id"])
+        frame["when"] = frame["posted_at"].fillna(frame["scraped_at"])
+        frame = frame.explode("matched_keywords").dropna(subset=["matched_keywords"])
+        return (
+            frame.groupby([pd.Grouper(key="when", freq=freq), "matched_keywords"])
+            .size()
+            .unstack(fill_value=0)
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from config import AppConfig
+
+    p = argparse.ArgumentParser(description="Posts per keyword from the job archive")
+    p.add_argument("--since", type=date.fromisoformat)
+    p.add_argument("--until", type=date.fromisoformat)
+    p.add_argument("--freq", default="D", help="pandas period, e.g. D, W, MS")
+    args = p.parse_args()
+    with pd.option_context("display.width", 200, "display.max_columns", 50):
+        print(JobArchive(AppConfig().archive_path).keyword_counts(args.since, args.until, args.freq))
@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+from domain.job import canonical_key
+
+
+# a matched job whose alert never went out is retried for this long
+RETRY_PENDING = 86400
+
+
+class SeenJobStore:
+    """
+    SQLite-backed record of every project a scraper has already handled.
+    Matched projects are stored as ``pending`` until their alert is
+    delivered (or they are deliberately dropped), so a failed send or a
+    killed run is picked up again by the next one.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL + a long busy timeout: queue worker processes share this file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_jobs (
+                source      TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                url         TEXT NOT NULL,
+                title       TEXT NOT NULL DEFAULT '',
+                first_seen  REAL NOT NULL,
+                last_seen   REAL NOT NULL,
+                notified_at REAL,
+                pending     INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (source, key)
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(seen_jobs)")}
+        if "pending" not in columns:
+            try:
+                self._conn.execute("ALTER TABLE seen_jobs ADD COLUMN pending INTEGER NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                pass  # another worker process added it first
+        self._conn.commit()
+
+    # =====================================================
+    # queries
+    # =====================================================
+
+    def known(self, source: str, urls: Iterable[str]) -> set[str]:
+        """Return the subset of ``urls`` already recorded for ``source``."""
+        by_key = {canonical_key(u): u for u in urls}
+        if not by_key:
+            return set()
+        placeholders = ",".join("?" * len(by_key))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key FROM seen_jobs WHERE source = ? AND key IN ({placeholders})",
+                (source, *by_key),
+            ).fetchall()
+        return {by_key[k] for (k,) in rows}
+
+    def is_known(self, source: str, url: str) -> bool:
+        return bool(self.known(source, [url]))
+
+    def settled(self, source: str, urls: Iterable[str]) -> set[str]:
+        """
+        Like :meth:`known`, minus pending projects that are still due a
+        retry (matched, not yet notified, first seen within ``RETRY_PENDING``).
+        """
+        by_key = {canonical_key(u): u for u in urls}
+        if not by_key:
+            return set()
+        placeholders = ",".join("?" * len(by_key))
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT key FROM seen_jobs
+                WHERE source = ? AND key IN ({placeholders})
+                  AND (pending = 0 OR notified_at IS NOT NULL OR first_seen < ?)
+                """,
+                (source, *by_key, time.time() - RETRY_PENDING),
+            ).fetchall()
+        return {by_key[k] for (k,) in rows}
+
+    def is_notified(self, source: str, url: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT notified_at FROM seen_jobs WHERE source = ? AND key = ?",
+                (source, canonical_key(url)),
+            ).fetchone()
+        return bool(row and row[0])
+
+    # =====================================================
+    # updates
+    # =====================================================
+
+    def touch(self, source: str, url: str, title: str = "") -> None:
+        """Insert the project or bump its ``last_seen`` time."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO seen_jobs (source, key, url, title, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source, key) DO UPDATE SET last_seen = excluded.last_seen
+                """,
+                (source, canonical_key(url), url, title, now, now),
+            )
+            self._conn.commit()
+
+    def touch_many(self, source: str, items: Iterable[tuple[str, str]], pending: bool = False) -> None:
+        """
+        Bulk variant of :meth:`touch` for ``(url, title)`` pairs;
+        ``pending`` marks them as matched jobs awaiting their alert.
+        """
+        now = time.time()
+        rows = [(source, canonical_key(u), u, t, now, now, int(pending)) for u, t in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO seen_jobs (source, key, url, title, first_seen, last_seen, pending)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source, key) DO UPDATE SET last_seen = excluded.last_seen,
+                                                        pending = excluded.pending
+                """,
+                rows,
+            )
+            self._conn.commit()
+
+    def settle(self, source: str, urls: Iterable[str]) -> None:
+        """Clear ``pending`` for jobs dropped on purpose (duplicate, ranked out, unrouted)."""
+        keys = [(source, canonical_key(u)) for u in urls]
+        if not keys:
+            return
+        with self._lock:
+            self._conn.executemany("UPDATE seen_jobs SET pending = 0 WHERE source = ? AND key = ?", keys)
+            self._conn.commit()
+
+    def mark_notified(self, source: str, url: str) -> None:
+        self.touch(source, url)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE seen_jobs SET notified_at = ?, pending = 0 WHERE source = ? AND key = ?",
+                (time.time(), source, canonical_key(url)),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
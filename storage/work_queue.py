@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+
+# later stages first, so a cycle drains to Telegram instead of piling up list pages
+PRIORITY = {"send": 3, "enrich": 2, "detail": 1, "list": 0, "crawl": 0}
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if len(obj) == 1 and "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+@dataclass(frozen=True)
+class Task:
+    id: int
+    kind: str
+    source: str
+    payload: Any
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Durable SQLite task queue shared by worker processes. :meth:`lease`
+    hands a task to one worker for ``lease_seconds``; the worker must
+    :meth:`ack` (done) or :meth:`fail` (retry) it before the lease runs
+    out, otherwise it is handed out again. After ``max_attempts`` leases a
+    task is parked as ``failed``.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600, max_attempts: int = 3):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # autocommit: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id          INTEGER PRIMARY KEY,
+                kind        TEXT NOT NULL,
+                source      TEXT NOT NULL,
+                key         TEXT UNIQUE,
+                payload     TEXT NOT NULL,
+                priority    INTEGER NOT NULL DEFAULT 0,
+                state       TEXT NOT NULL DEFAULT 'pending',
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL,
+                worker      TEXT,
+                error       TEXT,
+                created_at  REAL NOT NULL,
+                updated_at  REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks (state, priority DESC, id)"
+        )
+
+    # =====================================================
+    # producers
+    # =====================================================
+
+    def put(self, kind: str, source: str, payload, key: str | None = None) -> bool:
+        """
+        Enqueue a task. A non-empty ``key`` makes it idempotent: a second
+        put with the same key is ignored (returns False).
+        """
+        return self.put_many(kind, source, [(payload, key)]) > 0
+
+    def put_many(self, kind: str, source: str, items: Iterable[tuple[Any, str | None]]) -> int:
+        now = time.time()
+        rows = [
+            (kind, source, key, json.dumps(payload, ensure_ascii=False, default=_encode),
+             PRIORITY.get(kind, 0), now, now)
+            for payload, key in items
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO tasks (kind, source, key, payload, priority, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.total_changes - before
+
+    # =====================================================
+    # consumers
+    # =====================================================
+
+    def lease(self, worker: str) -> Task | None:
+        """Take the next ready task (pending, or leased and expired), or None."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # a worker that died on its last attempt: park the task
+                self._conn.execute(
+                    """
+                    UPDATE tasks SET state = 'failed', error = 'lease expired', updated_at = ?
+                    WHERE state = 'leased' AND lease_until < ? AND attempts >= ?
+                    """,
+                    (now, now, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    """
+                    SELECT id, kind, source, payload, attempts FROM tasks
+                    WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?)
+                    ORDER BY priority DESC, id LIMIT 1
+                    """,
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        """
+                        UPDATE tasks SET state = 'leased', attempts = attempts + 1,
+                                         lease_until = ?, worker = ?, updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (now + self.lease_seconds, worker, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        task_id, kind, source, payload, attempts = row
+        return Task(task_id, kind, source, json.loads(payload, object_hook=_decode), attempts + 1)
+
+    def ack(self, task: Task) -> None:
+        self._finish(task, "done")
+
+    def fail(self, task: Task, error: str = "") -> None:
+        """Hand the task back for a retry, or park it once out of attempts."""
+        self._finish(task, "failed" if task.attempts >= self.max_attempts else "pending", error)
+
+    def _finish(self, task: Task, state: str, error: str = "") -> None:
+        # attempts identifies the lease: a late answer after a re-lease is ignored
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE tasks SET state = ?, error = ?, lease_until = NULL, updated_at = ?
+                WHERE id = ? AND state = 'leased' AND attempts = ?
+                """,
+                (state, error or None, time.time(), task.id, task.attempts),
+            )
+
+    # =====================================================
+    # housekeeping
+    # =====================================================
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall()
+        return dict(rows)
+
+    def active(self) -> int:
+        """Tasks still pending or leased (0 = the queue has drained)."""
+        counts = self.counts()
+        return counts.get("pending", 0) + counts.get("leased", 0)
+
+    def prune(self, older_than: float) -> int:
+        """Drop finished tasks (and their dedupe keys) older than ``older_than`` seconds."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM tasks WHERE state IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - older_than,),
+            )
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()